@@ -965,7 +965,36 @@ def execute_tool_endpoint(tool_name):
         
         result = tool_router.execute_tool(tool_name, input_text)
         return jsonify(result)
-        
+    
+    except Exception as e:
+        return jsonify({"error": f"Tool execution failed: {str(e)}"}), 500
+
+@app.route('/api/tools/execute', methods=['POST'])
+def execute_tools_endpoint():
+    """Execute several tools concurrently, returning results in request order"""
+    if not TOOL_ROUTING_ENABLED:
+        return jsonify({"error": "Tool routing system not available"})
+    
+    try:
+        data = request.get_json()
+        calls = data.get('calls') if data else None
+        
+        if not isinstance(calls, list) or not calls:
+            return jsonify({"error": "calls must be a non-empty list of {tool, input}"}), 400
+        if len(calls) > 10:
+            return jsonify({"error": "At most 10 calls per request"}), 400
+        if not all(isinstance(call, dict) and call.get('tool') and call.get('input') for call in calls):
+            return jsonify({"error": "Each call needs a tool and an input"}), 400
+        
+        # Async tools run on the router's event loop and sync tools on its call pool,
+        # so this request waits for the slowest call rather than their sum
+        results = tool_router.execute_tools([(call['tool'], call['input']) for call in calls])
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "status": "success"
+        })
+    
     except Exception as e:
         return jsonify({"error": f"Tool execution failed: {str(e)}"}), 500
 
@@ -1026,6 +1055,59 @@ def route_query_endpoint():
     except Exception as e:
         return jsonify({"error": f"Routing failed: {str(e)}"}), 500
 
+@app.route('/api/route/metrics', methods=['GET'])
+def route_metrics_endpoint():
+    """Get tool routing metrics"""
+    if not TOOL_ROUTING_ENABLED:
+        return jsonify({"error": "Tool routing system not available"})
+    
+    try:
+        return jsonify({
+            "metrics": tool_router.get_routing_metrics(),
+            "status": "success"
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get routing metrics: {str(e)}"}), 500
+
+@app.route('/api/route/breakers', methods=['GET'])
+def route_breakers_endpoint():
+    """Get circuit breaker state per tool (admin only)"""
+    if not TOOL_ROUTING_ENABLED:
+        return jsonify({"error": "Tool routing system not available"})
+    
+    try:
+        auth_result = check_auth_and_permissions(['system_diagnostics'])
+        if not auth_result['success']:
+            return jsonify({"error": auth_result['error']}), auth_result['status_code']
+        
+        return jsonify({
+            "breakers": tool_router.get_breaker_status(),
+            "status": "success"
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get circuit breakers: {str(e)}"}), 500
+
+@app.route('/api/route/breakers/<tool_name>/reset', methods=['POST'])
+def reset_route_breaker_endpoint(tool_name):
+    """Close a tool's circuit breaker (admin only)"""
+    if not TOOL_ROUTING_ENABLED:
+        return jsonify({"error": "Tool routing system not available"})
+    
+    try:
+        auth_result = check_auth_and_permissions(['plugin_management'])
+        if not auth_result['success']:
+            return jsonify({"error": auth_result['error']}), auth_result['status_code']
+        
+        if tool_router.reset_breaker(tool_name):
+            return jsonify({"message": f"Circuit breaker for '{tool_name}' reset", "status": "success"})
+        else:
+            return jsonify({"error": f"Tool '{tool_name}' not found"}), 404
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to reset circuit breaker: {str(e)}"}), 500
+
 # Session Management Endpoints
 @app.route('/api/sessions', methods=['GET'])
 def get_sessions():
@@ -1180,22 +1262,7 @@ def get_logs():
         )
         
         # Convert to JSON-serializable format
-        logs_data = []
-        for log in logs:
-            logs_data.append({
-                "id": log.id,
-                "timestamp": log.timestamp.isoformat(),
-                "level": log.level.value,
-                "category": log.category.value,
-                "user_id": log.user_id,
-                "session_id": log.session_id,
-                "action": log.action,
-                "details": log.details,
-                "duration_ms": log.duration_ms,
-                "success": log.success,
-                "error_message": log.error_message,
-                "metadata": log.metadata
-            })
+        logs_data = [log.to_dict() for log in logs]
         
         return jsonify({
             "logs": logs_data,
@@ -2019,6 +2086,38 @@ def check_permission():
     except Exception as e:
         return jsonify({"error": f"Permission check failed: {str(e)}"}), 500
 
+@app.route('/api/permissions/check/batch', methods=['POST'])
+def check_permissions_batch():
+    """Check many permissions and resources for one user in a single call"""
+    try:
+        if not RBAC_MANAGER_ENABLED:
+            return jsonify({"error": "RBAC manager not available"}), 503
+        
+        data = request.get_json() or {}
+        user_id = data.get('user_id')
+        permissions = data.get('permissions') or []
+        resources = data.get('resources') or []
+        
+        if not user_id or not (permissions or resources):
+            return jsonify({"error": "user_id and permissions or resources required"}), 400
+        
+        if not isinstance(permissions, list) or not isinstance(resources, list):
+            return jsonify({"error": "permissions and resources must be lists"}), 400
+        
+        if not all(isinstance(item, str) for item in permissions + resources):
+            return jsonify({"error": "permissions and resources must contain only strings"}), 400
+        
+        if len(permissions) + len(resources) > 500:
+            return jsonify({"error": "At most 500 permissions and resources per request"}), 400
+        
+        results = rbac_manager.check_permissions_batch(user_id, permissions, resources)
+        results["status"] = "success"
+        
+        return jsonify(results)
+        
+    except Exception as e:
+        return jsonify({"error": f"Batch permission check failed: {str(e)}"}), 500
+
 @app.route('/api/roles', methods=['GET'])
 def get_roles():
     """Get all available roles"""
@@ -2073,7 +2172,14 @@ def get_security_events():
             except ValueError:
                 return jsonify({"error": f"Invalid risk level: {risk_level}"}), 400
         
-        events = risk_filter.get_security_events(user_id, risk_level_enum, limit)
+        # Optional ISO-8601 time range, served from the persisted event history
+        try:
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+        except ValueError:
+            return jsonify({"error": "since and until must be ISO-8601 timestamps"}), 400
+        
+        events = risk_filter.get_security_events(user_id, risk_level_enum, limit, since, until)
         
         return jsonify({
             "events": events,
@@ -2343,6 +2449,27 @@ def revoke_api_key(key_id):
     except Exception as e:
         return jsonify({"error": f"Failed to revoke API key: {str(e)}"}), 500
 
+@app.route('/api/gateway/keys/<key_id>/rotate', methods=['POST'])
+def rotate_api_key(key_id):
+    """Rotate API key secret (admin only)"""
+    try:
+        if not API_GATEWAY_ENABLED:
+            return jsonify({"error": "API Gateway not available"}), 503
+        
+        auth_result = check_auth_and_permissions(['user_management'])
+        if not auth_result['success']:
+            return jsonify({"error": auth_result['error']}), auth_result['status_code']
+        
+        result = api_gateway.rotate_api_key(key_id, auth_result['user']['id'])
+        
+        if result:
+            return jsonify(result)
+        else:
+            return jsonify({"error": "Active API key not found"}), 404
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to rotate API key: {str(e)}"}), 500
+
 @app.route('/api/gateway/keys/<key_id>/stats', methods=['GET'])
 def get_api_key_stats(key_id):
     """Get API key usage statistics"""
@@ -2374,6 +2501,25 @@ def get_gateway_stats():
     except Exception as e:
         return jsonify({"error": f"Failed to get gateway stats: {str(e)}"}), 500
 
+@app.route('/api/gateway/metrics', methods=['GET'])
+def get_gateway_metrics():
+    """Get external API latency percentiles and error rates per key and route across workers (admin only)"""
+    try:
+        if not API_GATEWAY_ENABLED:
+            return jsonify({"error": "API Gateway not available"}), 503
+        
+        auth_result = check_auth_and_permissions(['system_diagnostics'])
+        if not auth_result['success']:
+            return jsonify({"error": auth_result['error']}), auth_result['status_code']
+        
+        key_id = request.args.get('key_id')
+        metrics = api_gateway.get_request_metrics(key_id)
+        
+        return jsonify(metrics)
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get gateway metrics: {str(e)}"}), 500
+
 # ===== PHASE 8: COMPLIANCE & GOVERNANCE ENDPOINTS =====
 
 @app.route('/api/compliance/status', methods=['GET'])
@@ -0,0 +1,194 @@
+"""
+Routing Benchmark for Jarvis
+Runs ToolRouter.route_query over a labeled query corpus and reports routing
+latency, throughput and top-1 accuracy, compared against a stored baseline.
+
+Latency is also expressed relative to a fixed reference workload timed in the
+same run, so baselines recorded on one machine can be checked on another;
+latency changes are reported as warnings unless --fail-on-latency is given.
+
+Usage:
+    python benchmarks/benchmark_routing.py
+    python benchmarks/benchmark_routing.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_CORPUS = os.path.join(BENCHMARK_DIR, 'routing_corpus.jsonl')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'routing_baseline.json')
+
+# The benchmark measures routing only; no file watching in the background
+os.environ.setdefault('TOOL_RELOAD_INTERVAL', '0')
+sys.path.insert(0, ROOT_DIR)
+
+from src.services.tool_router import tool_router  # noqa: E402
+
+REFERENCE_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def load_corpus(path: str) -> List[Dict]:
+    """Load labeled queries ({"query", "expected_tool"} per line)"""
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def reference_workload(query: str) -> Dict[str, int]:
+    """Fixed pure-Python work per query (tokenize and count), used as the latency yardstick"""
+    counts: Dict[str, int] = {}
+    for token in REFERENCE_TOKEN_PATTERN.findall(query.lower()):
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+def run_benchmark(corpus: List[Dict], threshold: float, rounds: int) -> Dict:
+    """Route every query `rounds` times and collect latency and accuracy"""
+    # Warm up lazy imports, caches and the scoring pool
+    for row in corpus[:100]:
+        tool_router.route_query(row['query'], threshold)
+    
+    latencies_us = []
+    reference_us = []
+    correct = 0
+    misroutes = Counter()
+    per_tool = {}
+    
+    routing_time = 0.0
+    for round_index in range(rounds):
+        # Time the reference in each round too, so both see the same machine conditions
+        for row in corpus:
+            query_started = time.perf_counter()
+            reference_workload(row['query'])
+            reference_us.append((time.perf_counter() - query_started) * 1_000_000)
+        
+        started = time.perf_counter()
+        for row in corpus:
+            query_started = time.perf_counter()
+            tool_name, _, _ = tool_router.route_query(row['query'], threshold)
+            latencies_us.append((time.perf_counter() - query_started) * 1_000_000)
+            
+            if round_index > 0:
+                continue
+            
+            expected = row['expected_tool']
+            tool_stats = per_tool.setdefault(expected or 'none', {'total': 0, 'correct': 0})
+            tool_stats['total'] += 1
+            if tool_name == expected:
+                correct += 1
+                tool_stats['correct'] += 1
+            else:
+                misroutes[f"{expected or 'none'} -> {tool_name or 'none'}"] += 1
+        routing_time += time.perf_counter() - started
+    
+    latencies_us.sort()
+    reference_us.sort()
+    p50_us = percentile(latencies_us, 50)
+    p99_us = percentile(latencies_us, 99)
+    reference_p50_us = percentile(reference_us, 50)
+    return {
+        'queries': len(corpus),
+        'rounds': rounds,
+        'threshold': threshold,
+        'p50_us': round(p50_us, 2),
+        'p99_us': round(p99_us, 2),
+        'reference_p50_us': round(reference_p50_us, 2),
+        # Routing latency in multiples of the reference workload; comparable across machines
+        'p50_relative': round(p50_us / reference_p50_us, 2) if reference_p50_us else 0.0,
+        'p99_relative': round(p99_us / reference_p50_us, 2) if reference_p50_us else 0.0,
+        'throughput_qps': round(len(latencies_us) / routing_time, 1) if routing_time else 0.0,
+        'accuracy': round(correct / len(corpus), 4) if corpus else 0.0,
+        'accuracy_by_tool': {
+            tool: round(stats['correct'] / stats['total'], 4) for tool, stats in sorted(per_tool.items())
+        },
+        'top_misroutes': dict(misroutes.most_common(10))
+    }
+
+def compare_latency(results: Dict, baseline: Dict, latency_tolerance: float) -> List[str]:
+    """Return latency regressions against the baseline, measured relative to the reference workload"""
+    regressions = []
+    for metric in ('p50_relative', 'p99_relative'):
+        if metric not in baseline:
+            continue
+        allowed = baseline[metric] * (1 + latency_tolerance)
+        if results[metric] > allowed:
+            regressions.append(f"{metric} {results[metric]} exceeds baseline {baseline[metric]} (+{latency_tolerance:.0%})")
+    return regressions
+
+def compare_to_baseline(results: Dict, baseline: Dict, accuracy_tolerance: float) -> List[str]:
+    """Return a list of accuracy regressions against the baseline (empty if none)"""
+    regressions = []
+    
+    if results['accuracy'] < baseline['accuracy'] - accuracy_tolerance:
+        regressions.append(f"accuracy {results['accuracy']} below baseline {baseline['accuracy']}")
+    
+    for tool, accuracy in baseline.get('accuracy_by_tool', {}).items():
+        current = results['accuracy_by_tool'].get(tool, 0.0)
+        if current < accuracy - accuracy_tolerance:
+            regressions.append(f"accuracy for {tool} {current} below baseline {accuracy}")
+    
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark ToolRouter routing speed and accuracy')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Labeled query corpus (JSON lines)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.3, help='Routing confidence threshold')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the corpus for latency')
+    parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                        help='Allowed increase of latency relative to the reference workload')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.005,
+                        help='Allowed absolute accuracy drop below baseline')
+    parser.add_argument('--fail-on-latency', action='store_true',
+                        help='Exit non-zero on latency regressions (by default they are only reported)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results as the new baseline')
+    args = parser.parse_args()
+    
+    results = run_benchmark(load_corpus(args.corpus), args.threshold, args.rounds)
+    print(json.dumps(results, indent=2))
+    
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one")
+        return 0
+    
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    
+    regressions = compare_to_baseline(results, baseline, args.accuracy_tolerance)
+    latency_regressions = compare_latency(results, baseline, args.latency_tolerance)
+    if args.fail_on_latency:
+        regressions += latency_regressions
+    elif latency_regressions:
+        print("Latency warnings against baseline (advisory):")
+        for regression in latency_regressions:
+            print(f"  - {regression}")
+    
+    if regressions:
+        print("Routing regressions against baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    
+    print("No routing regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
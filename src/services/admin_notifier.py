@@ -0,0 +1,199 @@
+"""
+Admin Notifier for Jarvis AI Assistant
+Delivers security alerts to administrators from a bounded background queue,
+batching bursts per user and risk category and retrying failed deliveries.
+"""
+
+import os
+import queue
+import threading
+import time
+import requests
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logging_service import logging_service
+
+SEVERITY_ORDER = ["safe", "low", "medium", "high", "critical"]
+
+class AdminNotifier:
+    """Background dispatcher for administrator security alerts"""
+    
+    def __init__(self, sender: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.max_queue_size = int(os.getenv('ADMIN_NOTIFY_QUEUE_SIZE', '1000'))
+        self.batch_window = float(os.getenv('ADMIN_NOTIFY_BATCH_WINDOW', '10'))  # seconds
+        self.max_retries = int(os.getenv('ADMIN_NOTIFY_MAX_RETRIES', '3'))
+        self.retry_backoff = float(os.getenv('ADMIN_NOTIFY_RETRY_BACKOFF', '2'))  # seconds, doubled per attempt
+        self.webhook_url = os.getenv('SECURITY_ALERT_WEBHOOK_URL', '')
+        
+        # Delivery callable; replace with a local stand-in in tests
+        self.sender = sender or self._default_sender
+        
+        self.queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue_size)
+        
+        # Owned by the worker thread: open batches per (user, categories) and failed batches awaiting retry
+        self.batches: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.retrying: List[Dict[str, Any]] = []
+        
+        self.stats_lock = threading.Lock()
+        self.stats = {"queued": 0, "dropped": 0, "sent": 0, "failed": 0, "retried": 0, "batched": 0}
+        
+        self.thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self.thread.start()
+    
+    def notify(self, notification: Dict[str, Any]) -> bool:
+        """Queue a notification without blocking; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait(("notify", notification))
+        except queue.Full:
+            self._increment("dropped")
+            print(f"Admin notification queue full, dropping alert for {notification.get('user_id')}")
+            return False
+        
+        self._increment("queued")
+        return True
+    
+    def set_sender(self, sender: Callable[[Dict[str, Any]], None]):
+        """Replace the delivery callable (e.g. with a local stand-in)"""
+        self.sender = sender
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Deliver every open batch now, waiting up to timeout; returns True once dispatched"""
+        done = threading.Event()
+        try:
+            self.queue.put(("flush", done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get queue depth and delivery counters"""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats.update({
+            "queue_depth": self.queue.qsize(),
+            "open_batches": len(self.batches),
+            "awaiting_retry": len(self.retrying),
+            "batch_window_seconds": self.batch_window
+        })
+        return stats
+    
+    def _increment(self, counter: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[counter] += amount
+    
+    def _dispatch_loop(self):
+        """Worker: collect queued alerts into batches and deliver them when their window closes"""
+        while True:
+            try:
+                try:
+                    kind, payload = self.queue.get(timeout=self._next_wakeup())
+                except queue.Empty:
+                    kind, payload = None, None
+                
+                if kind == "notify":
+                    self._add_to_batch(payload)
+                    self._deliver_due()
+                elif kind == "flush":
+                    self._deliver_due(force=True)
+                    payload.set()
+                else:
+                    self._deliver_due()
+            except Exception as e:
+                print(f"Admin notification dispatch error: {e}")
+    
+    def _next_wakeup(self) -> float:
+        """Seconds until the earliest batch window closes or retry is due"""
+        deadlines = [batch["deadline"] for batch in self.batches.values()]
+        deadlines += [batch["deadline"] for batch in self.retrying]
+        if not deadlines:
+            return 1.0
+        return min(1.0, max(0.0, min(deadlines) - time.monotonic()))
+    
+    def _add_to_batch(self, notification: Dict[str, Any]):
+        """Merge a notification into the open batch for its user and categories"""
+        key = (notification.get("user_id", "unknown"), ",".join(sorted(notification.get("risk_categories", []))))
+        batch = self.batches.get(key)
+        if batch is None:
+            self.batches[key] = {
+                "deadline": time.monotonic() + self.batch_window,
+                "attempts": 0,
+                "notifications": [notification]
+            }
+        else:
+            batch["notifications"].append(notification)
+            self._increment("batched")
+    
+    def _deliver_due(self, force: bool = False):
+        """Deliver closed batches and retries that are due"""
+        now = time.monotonic()
+        
+        due = [key for key, batch in self.batches.items() if force or batch["deadline"] <= now]
+        for key in due:
+            self._deliver(self.batches.pop(key))
+        
+        retries = [batch for batch in self.retrying if force or batch["deadline"] <= now]
+        if retries:
+            self.retrying = [batch for batch in self.retrying if not (force or batch["deadline"] <= now)]
+            for batch in retries:
+                self._increment("retried")
+                self._deliver(batch)
+    
+    def _deliver(self, batch: Dict[str, Any]):
+        """Send one batch as a single alert, scheduling a retry on failure"""
+        alert = self._build_alert(batch["notifications"])
+        try:
+            self.sender(alert)
+            self._increment("sent")
+        except Exception as e:
+            batch["attempts"] += 1
+            if batch["attempts"] > self.max_retries:
+                self._increment("failed")
+                print(f"Failed to send admin notification after {batch['attempts']} attempts: {e}")
+                return
+            
+            batch["deadline"] = time.monotonic() + self.retry_backoff * (2 ** (batch["attempts"] - 1))
+            self.retrying.append(batch)
+    
+    def _build_alert(self, notifications: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine a batch of notifications into one alert"""
+        latest = notifications[-1]
+        if len(notifications) == 1:
+            return dict(latest, event_count=1)
+        
+        severity = max(
+            (n.get("severity", "low") for n in notifications),
+            key=lambda level: SEVERITY_ORDER.index(level) if level in SEVERITY_ORDER else 0
+        )
+        return dict(
+            latest,
+            severity=severity,
+            event_count=len(notifications),
+            first_timestamp=notifications[0].get("timestamp"),
+            commands=[n.get("command") for n in notifications[-5:]],
+            blocked_count=sum(1 for n in notifications if n.get("action_taken") == "blocked")
+        )
+    
+    def _default_sender(self, alert: Dict[str, Any]):
+        """Post the alert to the configured webhook, if any, then log it as sent"""
+        if self.webhook_url:
+            try:
+                response = requests.post(self.webhook_url, json=alert, timeout=10)
+                response.raise_for_status()
+            except Exception as e:
+                if logging_service:
+                    logging_service.log_activity('system', 'admin_notification_failed', {
+                        'user_id': alert.get('user_id'),
+                        'severity': alert.get('severity'),
+                        'event_count': alert.get('event_count', 1),
+                        'error': str(e)
+                    })
+                raise
+        
+        if logging_service:
+            logging_service.log_activity('system', 'admin_notification_sent', alert)
+        
+        print(f"🚨 SECURITY ALERT: {alert['severity']} risk command from {alert['user_id']}"
+              f"{' (' + str(alert['event_count']) + ' events)' if alert.get('event_count', 1) > 1 else ''}")
+
+# Global admin notifier instance
+admin_notifier = AdminNotifier()
@@ -6,15 +6,26 @@ Enables external systems to access Jarvis via secure API endpoints.
 import os
 import json
 import time
+import atexit
+import threading
 import uuid
+import math
 import hashlib
 import secrets
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify
 
 from .logging_service import logging_service, LogLevel, LogCategory
+from ..utils.latency_histogram import RequestMetrics, SQLiteMetricsStore
+from ..utils.rate_limiter import SQLiteTokenBucketLimiter, TokenBucketLimiter
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file lock
+    fcntl = None
 
 class APIKeyPermission:
     """API key permission constants"""
@@ -25,6 +36,13 @@ class APIKeyPermission:
     MODE = "mode"
     ADMIN = "admin"
 
+class RateLimitExceeded(Exception):
+    """Raised when a valid API key is over its rate limits"""
+    def __init__(self, api_key: 'APIKey', retry_after: float):
+        super().__init__("Rate limit exceeded")
+        self.api_key = api_key
+        self.retry_after = retry_after  # seconds until the next request is allowed
+
 class RateLimit:
     """Rate limiting configuration"""
     def __init__(self, requests_per_minute: int = 100, requests_per_hour: int = 1000):
@@ -74,8 +92,14 @@ class APIGateway:
     def __init__(self):
         self.enabled = os.getenv('API_GATEWAY_ENABLED', 'True').lower() == 'true'
         self.api_keys: Dict[str, APIKey] = {}
-        self.rate_limit_cache: Dict[str, Dict[str, List[float]]] = {}
+        self.keys_by_hash: Dict[str, APIKey] = {}  # key hash -> key, for constant-time validation
+        self.local_rate_limiter = TokenBucketLimiter(
+            max_clients=int(os.getenv('API_RATE_LIMIT_MAX_CLIENTS', '100000'))
+        )
+        self.rate_limiter = self._create_rate_limiter()
         self.api_keys_file = os.path.join(os.path.dirname(__file__), '../../state/api_keys.json')
+        self.api_keys_version = None  # keys file identity the in-memory index was loaded from
+        self.keys_lock = threading.Lock()
         
         # Default rate limits
         self.default_rate_limit = RateLimit(
@@ -83,39 +107,56 @@ class APIGateway:
             requests_per_hour=int(os.getenv('API_DEFAULT_RPH', '1000'))
         )
         
+        # Usage since the last flush per key: key_id -> [request count, last used]
+        self.pending_usage: Dict[str, List[Any]] = {}
+        self.usage_lock = threading.Lock()
+        self.usage_flush_interval = int(os.getenv('API_USAGE_FLUSH_INTERVAL', '30'))  # seconds
+        
+        # Per key and route latency histograms recorded by this worker since the last
+        # flush, added write-behind to the store shared by all workers
+        self.request_metrics = RequestMetrics()
+        self.metrics_store = self._create_metrics_store()
+        
         # Load existing API keys
         self._load_api_keys()
         
+        # Persist usage counters and metrics in the background and at shutdown, never per request
+        self._start_usage_flush_thread()
+        atexit.register(self.flush_usage)
+        atexit.register(self.flush_metrics)
+        
         print("✅ API Gateway initialized")
     
+    def _create_rate_limiter(self):
+        """Share limiter state across workers through SQLite unless configured for memory only"""
+        backend = os.getenv('API_RATE_LIMIT_BACKEND', 'sqlite').lower()
+        if backend == 'memory':
+            return self.local_rate_limiter
+        
+        db_path = os.getenv('API_RATE_LIMIT_DB', os.path.join(os.path.dirname(__file__), '../../state/rate_limits.db'))
+        try:
+            return SQLiteTokenBucketLimiter(db_path)
+        except Exception as e:
+            print(f"⚠️ Shared rate limit store unavailable, limiting per worker: {e}")
+            return self.local_rate_limiter
+    
+    def _create_metrics_store(self) -> Optional[SQLiteMetricsStore]:
+        """Share request metrics across workers through SQLite unless configured for memory only"""
+        if os.getenv('API_METRICS_BACKEND', 'sqlite').lower() == 'memory':
+            return None
+        
+        db_path = os.getenv('API_METRICS_DB', os.path.join(os.path.dirname(__file__), '../../state/api_metrics.db'))
+        try:
+            return SQLiteMetricsStore(db_path, self.request_metrics.bounds)
+        except Exception as e:
+            print(f"⚠️ Shared metrics store unavailable, reporting per worker: {e}")
+            return None
+    
     def _load_api_keys(self):
         """Load API keys from storage"""
         try:
             if os.path.exists(self.api_keys_file):
-                with open(self.api_keys_file, 'r') as f:
-                    data = json.load(f)
-                
-                for key_data in data.get('api_keys', []):
-                    api_key = APIKey(
-                        key_id=key_data['key_id'],
-                        key_hash=key_data['key_hash'],
-                        name=key_data['name'],
-                        permissions=key_data['permissions'],
-                        rate_limit=RateLimit(
-                            key_data['rate_limit']['requests_per_minute'],
-                            key_data['rate_limit']['requests_per_hour']
-                        ),
-                        created_by=key_data['created_by'],
-                        expires_at=datetime.fromisoformat(key_data['expires_at']) if key_data.get('expires_at') else None,
-                        ip_whitelist=key_data.get('ip_whitelist', [])
-                    )
-                    api_key.created_at = datetime.fromisoformat(key_data['created_at'])
-                    api_key.last_used = datetime.fromisoformat(key_data['last_used']) if key_data.get('last_used') else None
-                    api_key.usage_count = key_data.get('usage_count', 0)
-                    api_key.is_active = key_data.get('is_active', True)
-                    
-                    self.api_keys[api_key.key_id] = api_key
-                
+                self._refresh_api_keys()
                 print(f"✅ Loaded {len(self.api_keys)} API keys")
             else:
                 # Create default admin API key if none exist
@@ -125,28 +166,186 @@ class APIGateway:
             print(f"❌ Failed to load API keys: {e}")
             self._create_default_admin_key()
     
-    def _save_api_keys(self):
-        """Save API keys to storage"""
+    def _api_keys_file_version(self) -> Optional[Tuple[int, int, int]]:
+        """Identity of the current keys file; every atomic replace changes it"""
         try:
-            os.makedirs(os.path.dirname(self.api_keys_file), exist_ok=True)
+            stat = os.stat(self.api_keys_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _read_api_keys(self) -> Dict[str, APIKey]:
+        """Parse the keys file into APIKey objects by key ID"""
+        with open(self.api_keys_file, 'r') as f:
+            data = json.load(f)
+        
+        api_keys = {}
+        for key_data in data.get('api_keys', []):
+            api_key = APIKey(
+                key_id=key_data['key_id'],
+                key_hash=key_data['key_hash'],
+                name=key_data['name'],
+                permissions=key_data['permissions'],
+                rate_limit=RateLimit(
+                    key_data['rate_limit']['requests_per_minute'],
+                    key_data['rate_limit']['requests_per_hour']
+                ),
+                created_by=key_data['created_by'],
+                expires_at=datetime.fromisoformat(key_data['expires_at']) if key_data.get('expires_at') else None,
+                ip_whitelist=key_data.get('ip_whitelist', [])
+            )
+            api_key.created_at = datetime.fromisoformat(key_data['created_at'])
+            api_key.last_used = datetime.fromisoformat(key_data['last_used']) if key_data.get('last_used') else None
+            api_key.usage_count = key_data.get('usage_count', 0)
+            api_key.is_active = key_data.get('is_active', True)
+            api_keys[api_key.key_id] = api_key
+        return api_keys
+    
+    def _refresh_api_keys(self):
+        """
+        Reload the key index if another worker has replaced the keys file
+        
+        A stat per call is all it costs while the file is unchanged; after a
+        rotation or revocation anywhere, the next request in every worker
+        validates against the new hashes. Unflushed local usage is carried
+        over onto the reloaded counters.
+        """
+        version = self._api_keys_file_version()
+        if version is None or version == self.api_keys_version:
+            return
+        
+        with self.keys_lock:
+            version = self._api_keys_file_version()
+            if version is None or version == self.api_keys_version:
+                return
             
-            data = {
-                "api_keys": [
-                    {
-                        **api_key.to_dict(),
-                        "key_hash": api_key.key_hash
-                    }
-                    for api_key in self.api_keys.values()
-                ]
-            }
+            api_keys = self._read_api_keys()
+            with self.usage_lock:
+                for key_id, (count, last_used) in self.pending_usage.items():
+                    api_key = api_keys.get(key_id)
+                    if api_key:
+                        api_key.usage_count += count
+                        if not api_key.last_used or last_used > api_key.last_used:
+                            api_key.last_used = last_used
+            
+            self.api_keys = api_keys
+            self.keys_by_hash = {api_key.key_hash: api_key for api_key in api_keys.values()}
+            self.api_keys_version = version
+    
+    @contextmanager
+    def _api_keys_file_lock(self):
+        """Serialize writers of the API keys file across worker processes"""
+        os.makedirs(os.path.dirname(self.api_keys_file), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        
+        with open(f"{self.api_keys_file}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _write_api_keys_file(self, data: Dict[str, Any]):
+        """Atomically replace the API keys file"""
+        temp_file = f"{self.api_keys_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_file, self.api_keys_file)
+    
+    def _update_api_keys(self, change: Callable[[Dict[str, Dict[str, Any]]], Any] = None) -> Any:
+        """
+        Read-modify-write the keys file under the cross-process lock
+        
+        The stored records (key ID -> serialized key) are re-read, ``change``
+        applies this worker's mutation to them and pending usage deltas are
+        added on top, so nothing another worker wrote is overwritten with
+        this worker's stale copy. The in-memory index is then reloaded from
+        the result. Returns whatever ``change`` returns.
+        """
+        with self._api_keys_file_lock():
+            if os.path.exists(self.api_keys_file):
+                with open(self.api_keys_file, 'r') as f:
+                    data = json.load(f)
+            else:
+                data = {"api_keys": []}
+            records = {key_data['key_id']: key_data for key_data in data.get('api_keys', [])}
             
-            with open(self.api_keys_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            result = change(records) if change else None
             
-            print(f"✅ Saved {len(self.api_keys)} API keys")
+            with self.usage_lock:
+                pending, self.pending_usage = self.pending_usage, {}
+            try:
+                for key_id, (count, last_used) in pending.items():
+                    key_data = records.get(key_id)
+                    if not key_data:
+                        continue
+                    
+                    key_data['usage_count'] = key_data.get('usage_count', 0) + count
+                    stored_last_used = datetime.fromisoformat(key_data['last_used']) if key_data.get('last_used') else None
+                    if not stored_last_used or last_used > stored_last_used:
+                        key_data['last_used'] = last_used.isoformat()
+                
+                self._write_api_keys_file({"api_keys": list(records.values())})
+            except Exception:
+                # Keep the deltas for the next attempt
+                with self.usage_lock:
+                    for key_id, (count, last_used) in pending.items():
+                        current = self.pending_usage.get(key_id)
+                        if current:
+                            current[0] += count
+                        else:
+                            self.pending_usage[key_id] = [count, last_used]
+                raise
+        
+        self._refresh_api_keys()
+        return result
+    
+    def _record_usage(self, api_key: APIKey):
+        """Count a request in memory; flushed to storage by flush_usage"""
+        now = datetime.now()
+        with self.usage_lock:
+            api_key.last_used = now
+            api_key.usage_count += 1
             
+            pending = self.pending_usage.get(api_key.key_id)
+            if pending:
+                pending[0] += 1
+                pending[1] = now
+            else:
+                self.pending_usage[api_key.key_id] = [1, now]
+    
+    def flush_usage(self) -> int:
+        """
+        Add pending usage deltas to the stored counters in one atomic write
+        
+        The file is re-read under a cross-process lock and deltas are added to
+        it, so workers flushing independently never overwrite each other's
+        counts. Returns the number of keys with usage flushed.
+        """
+        with self.usage_lock:
+            pending_keys = len(self.pending_usage)
+        if not pending_keys:
+            return 0
+        
+        try:
+            self._update_api_keys()
+            return pending_keys
         except Exception as e:
-            print(f"❌ Failed to save API keys: {e}")
+            print(f"❌ Failed to flush API key usage: {e}")
+            return 0
+    
+    def _start_usage_flush_thread(self):
+        """Start background thread that flushes usage counters and request metrics"""
+        def flush_loop():
+            while True:
+                time.sleep(self.usage_flush_interval)
+                self.flush_usage()
+                self.flush_metrics()
+        
+        thread = threading.Thread(target=flush_loop, daemon=True)
+        thread.start()
     
     def _create_default_admin_key(self):
         """Create default admin API key"""
@@ -199,8 +398,9 @@ class APIGateway:
         )
         
         # Store API key
-        self.api_keys[key_id] = api_key_obj
-        self._save_api_keys()
+        def add_key(records):
+            records[key_id] = {**api_key_obj.to_dict(), "key_hash": key_hash}
+        self._update_api_keys(add_key)
         
         # Log API key creation
         if logging_service:
@@ -227,7 +427,13 @@ class APIGateway:
     
     def validate_api_key(self, api_key: str, required_permission: str = None,
                         client_ip: str = None) -> Tuple[bool, Optional[APIKey], Optional[str]]:
-        """Validate API key and check permissions"""
+        """
+        Validate API key and check permissions
+        
+        Once the secret matches a stored key, that key is returned even when
+        the request is rejected, so rejections can be attributed to it.
+        Raises RateLimitExceeded, carrying the key, when it is over its limits.
+        """
         
         if not api_key:
             return False, None, "API key required"
@@ -235,102 +441,120 @@ class APIGateway:
         # Hash the provided key
         key_hash = hashlib.sha256(api_key.encode()).hexdigest()
         
+        # Pick up keys rotated or revoked by other workers
+        self._refresh_api_keys()
+        
         # Find matching API key
-        api_key_obj = None
-        for key_obj in self.api_keys.values():
-            if key_obj.key_hash == key_hash:
-                api_key_obj = key_obj
-                break
+        api_key_obj = self.keys_by_hash.get(key_hash)
         
         if not api_key_obj:
             return False, None, "Invalid API key"
         
         # Check if key is active
         if not api_key_obj.is_active:
-            return False, None, "API key is disabled"
+            return False, api_key_obj, "API key is disabled"
         
         # Check expiration
         if api_key_obj.expires_at and datetime.now() > api_key_obj.expires_at:
-            return False, None, "API key has expired"
+            return False, api_key_obj, "API key has expired"
         
         # Check IP whitelist
         if api_key_obj.ip_whitelist and client_ip:
             if client_ip not in api_key_obj.ip_whitelist:
-                return False, None, "IP address not whitelisted"
+                return False, api_key_obj, "IP address not whitelisted"
         
         # Check permissions
         if required_permission and required_permission not in api_key_obj.permissions:
-            return False, None, f"Permission '{required_permission}' not granted"
+            return False, api_key_obj, f"Permission '{required_permission}' not granted"
         
         # Check rate limits
-        if not self._check_rate_limit(api_key_obj, client_ip):
-            return False, None, "Rate limit exceeded"
+        allowed, retry_after = self._check_rate_limit(api_key_obj, client_ip)
+        if not allowed:
+            raise RateLimitExceeded(api_key_obj, retry_after)
         
-        # Update usage statistics
-        api_key_obj.last_used = datetime.now()
-        api_key_obj.usage_count += 1
+        # Update usage statistics (persisted by the background flush)
+        self._record_usage(api_key_obj)
         
         return True, api_key_obj, None
     
-    def _check_rate_limit(self, api_key: APIKey, client_ip: str) -> bool:
-        """Check if request is within rate limits"""
-        
-        now = time.time()
-        cache_key = f"{api_key.key_id}:{client_ip}"
-        
-        if cache_key not in self.rate_limit_cache:
-            self.rate_limit_cache[cache_key] = {
-                'minute': [],
-                'hour': []
-            }
-        
-        cache = self.rate_limit_cache[cache_key]
-        
-        # Clean old entries
-        minute_ago = now - 60
-        hour_ago = now - 3600
-        
-        cache['minute'] = [t for t in cache['minute'] if t > minute_ago]
-        cache['hour'] = [t for t in cache['hour'] if t > hour_ago]
+    def _check_rate_limit(self, api_key: APIKey, client_ip: str) -> Tuple[bool, float]:
+        """Check if request is within rate limits; returns (allowed, retry_after_seconds)"""
+        client_key = f"{api_key.key_id}:{client_ip}"
+        limits = (api_key.rate_limit.requests_per_minute, api_key.rate_limit.requests_per_hour)
+        try:
+            return self.rate_limiter.acquire(client_key, *limits)
+        except Exception as e:
+            # Keep limiting within this worker while the shared store is unavailable
+            print(f"Shared rate limit check failed: {e}")
+            return self.local_rate_limiter.acquire(client_key, *limits)
+    
+    def revoke_api_key(self, key_id: str, revoked_by: str) -> bool:
+        """Revoke an API key"""
         
-        # Check limits
-        if len(cache['minute']) >= api_key.rate_limit.requests_per_minute:
-            return False
+        def deactivate(records):
+            key_data = records.get(key_id)
+            if not key_data:
+                return None
+            key_data['is_active'] = False
+            return key_data['name']
         
-        if len(cache['hour']) >= api_key.rate_limit.requests_per_hour:
+        name = self._update_api_keys(deactivate)
+        if name is None:
             return False
         
-        # Add current request
-        cache['minute'].append(now)
-        cache['hour'].append(now)
+        # Log API key revocation
+        if logging_service:
+            logging_service.log(
+                LogLevel.INFO,
+                LogCategory.AUTH,
+                'api_key_revoked',
+                user_id=revoked_by,
+                details={
+                    'key_id': key_id,
+                    'name': name
+                }
+            )
         
         return True
     
-    def revoke_api_key(self, key_id: str, revoked_by: str) -> bool:
-        """Revoke an API key"""
+    def rotate_api_key(self, key_id: str, rotated_by: str) -> Optional[Dict[str, Any]]:
+        """Replace an API key's secret, keeping its ID, permissions and limits"""
         
-        if key_id not in self.api_keys:
-            return False
+        new_key = f"jarvis_{secrets.token_urlsafe(32)}"
+        new_hash = hashlib.sha256(new_key.encode()).hexdigest()
         
-        api_key = self.api_keys[key_id]
-        api_key.is_active = False
+        def replace_hash(records):
+            key_data = records.get(key_id)
+            if not key_data or not key_data.get('is_active', True):
+                return False
+            key_data['key_hash'] = new_hash
+            return True
         
-        self._save_api_keys()
+        # The old secret stops working in every worker once the file is replaced
+        if not self._update_api_keys(replace_hash):
+            return None
+        api_key = self.api_keys[key_id]
         
-        # Log API key revocation
+        # Log API key rotation
         if logging_service:
             logging_service.log(
                 LogLevel.INFO,
                 LogCategory.AUTH,
-                'api_key_revoked',
-                user_id=revoked_by,
+                'api_key_rotated',
+                user_id=rotated_by,
                 details={
                     'key_id': key_id,
                     'name': api_key.name
                 }
             )
         
-        return True
+        return {
+            "api_key": new_key,  # Only returned once
+            "key_id": key_id,
+            "name": api_key.name,
+            "permissions": api_key.permissions,
+            "expires_at": api_key.expires_at.isoformat() if api_key.expires_at else None
+        }
     
     def list_api_keys(self, include_inactive: bool = False) -> List[Dict[str, Any]]:
         """List all API keys (without the actual key values)"""
@@ -389,6 +613,58 @@ class APIGateway:
                 error_message=error_message
             )
     
+    def record_request_metrics(self, api_key: APIKey, route: str, duration_ms: float, status_code: int):
+        """Record latency and outcome of a request made with a known key, including rejected ones"""
+        self.request_metrics.record(api_key.key_id, route, duration_ms, status_code >= 400)
+    
+    def flush_metrics(self) -> int:
+        """Add this worker's histograms since the last flush to the shared store; returns series flushed"""
+        if self.metrics_store is None:
+            return 0
+        
+        drained = self.request_metrics.drain()
+        try:
+            self.metrics_store.add(drained)
+            return len(drained)
+        except Exception as e:
+            # Keep the deltas for the next attempt
+            self.request_metrics.merge(drained)
+            print(f"❌ Failed to flush API request metrics: {e}")
+            return 0
+    
+    def get_request_metrics(self, key_id: str = None) -> Dict[str, Any]:
+        """
+        Get request counts, error rates and latency percentiles per key and per route
+        
+        With the shared store the result covers every worker: this worker
+        flushes first, others' requests appear after their next flush (at
+        most API_USAGE_FLUSH_INTERVAL old). Without it, only this worker's.
+        """
+        
+        if self.metrics_store is not None:
+            self.flush_metrics()
+            metrics = self.metrics_store.summary(key_id)
+        else:
+            metrics = self.request_metrics.summary(key_id)
+        by_client_route = metrics.pop("by_client_route")
+        
+        # Label keys with their names; key IDs alone say little about the integration
+        metrics["by_key"] = {
+            kid: dict(
+                summary,
+                name=self.api_keys[kid].name if kid in self.api_keys else None,
+                routes=by_client_route[kid]
+            )
+            for kid, summary in metrics.pop("by_client").items()
+        }
+        if self.metrics_store is not None:
+            metrics["scope"] = "all_workers"
+            metrics["flush_interval_seconds"] = self.usage_flush_interval
+        else:
+            metrics["scope"] = "worker"
+            metrics["worker_pid"] = os.getpid()
+        return metrics
+    
     def get_gateway_stats(self) -> Dict[str, Any]:
         """Get API gateway statistics"""
         
@@ -409,12 +685,22 @@ class APIGateway:
             "active_api_keys": active_keys,
             "total_requests": total_requests,
             "recent_usage_24h": recent_usage,
+            "rate_limit_backend": "sqlite" if isinstance(self.rate_limiter, SQLiteTokenBucketLimiter) else "memory",
+            "rate_limited_clients": len(self.rate_limiter),
             "default_rate_limit": {
                 "requests_per_minute": self.default_rate_limit.requests_per_minute,
                 "requests_per_hour": self.default_rate_limit.requests_per_hour
             }
         }
 
+def _response_status(response: Any) -> int:
+    """Status code of a Flask view return value"""
+    if isinstance(response, tuple):
+        if len(response) > 1 and isinstance(response[1], int):
+            return response[1]
+        response = response[0]
+    return getattr(response, 'status_code', 200)
+
 # Decorator for API key authentication
 def require_api_key(permission: str = None):
     """Decorator to require API key authentication"""
@@ -432,18 +718,44 @@ def require_api_key(permission: str = None):
             api_key = auth_header[7:]  # Remove 'Bearer ' prefix
             client_ip = request.remote_addr
             
+            route = request.url_rule.rule if request.url_rule else request.path
+            start_time = time.perf_counter()
+            
             # Validate API key
-            valid, api_key_obj, error_msg = api_gateway.validate_api_key(
-                api_key, permission, client_ip
-            )
+            try:
+                valid, api_key_obj, error_msg = api_gateway.validate_api_key(
+                    api_key, permission, client_ip
+                )
+                if not valid:
+                    response = jsonify({"error": error_msg})
+                    status_code = 401
+            except RateLimitExceeded as e:
+                valid, api_key_obj = False, e.api_key
+                retry_after = max(1, math.ceil(e.retry_after))
+                response = jsonify({"error": str(e), "retry_after": retry_after})
+                response.headers['Retry-After'] = str(retry_after)
+                status_code = 429
             
             if not valid:
-                return jsonify({"error": error_msg}), 401
+                # Count rejections against the key that made them
+                if api_key_obj:
+                    api_gateway.record_request_metrics(
+                        api_key_obj, route, (time.perf_counter() - start_time) * 1000, status_code
+                    )
+                return response, status_code
             
             # Add API key info to request context
             request.api_key = api_key_obj
             
-            return f(*args, **kwargs)
+            status_code = 500
+            try:
+                response = f(*args, **kwargs)
+                status_code = _response_status(response)
+                return response
+            finally:
+                api_gateway.record_request_metrics(
+                    api_key_obj, route, (time.perf_counter() - start_time) * 1000, status_code
+                )
         
         return decorated_function
     return decorator
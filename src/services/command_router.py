@@ -4,9 +4,10 @@ Intelligently classifies and routes user messages to appropriate handlers.
 """
 
 import re
+import os
 import json
 import openai
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, FrozenSet, List, Any, Optional, Pattern, Set, Tuple
 from enum import Enum
 from dataclasses import dataclass
 import logging
@@ -15,6 +16,7 @@ import logging
 from .tool_router import tool_router
 from .workflow_engine import workflow_engine
 from .logging_service import logging_service
+from ..utils.ttl_cache import TTLCache
 
 class CommandType(Enum):
     CHAT = "chat"
@@ -50,7 +52,14 @@ class CommandRouter:
     
     def __init__(self):
         self.routing_rules = self._initialize_routing_rules()
-        self.classification_cache = {}
+        self._build_rule_matcher()
+        
+        # Rule matches are cached per normalized message (shared across users);
+        # LLM classifications per exact message and user
+        self.classification_cache = TTLCache(
+            max_entries=int(os.getenv('COMMAND_CACHE_MAX_ENTRIES', '2048')),
+            ttl=float(os.getenv('COMMAND_CACHE_TTL', '600'))
+        )
         self.openai_client = openai.OpenAI()
         
         print("✅ Command router initialized")
@@ -122,13 +131,8 @@ class CommandRouter:
     def route_command(self, message: str, user_id: str = None, context: Dict[str, Any] = None) -> CommandClassification:
         """Route a command to the appropriate handler"""
         try:
-            # Check cache first
-            cache_key = f"{message}:{user_id}"
-            if cache_key in self.classification_cache:
-                return self.classification_cache[cache_key]
-            
-            # Classify the command
-            classification = self._classify_command(message, context or {})
+            # Classify the command (cached)
+            classification = self._cached_classify(message, user_id, context or {})
             
             # Validate permissions if user provided
             if user_id and classification.command_type != CommandType.CHAT:
@@ -142,9 +146,6 @@ class CommandRouter:
                         reasoning="Insufficient permissions for requested operation"
                     )
             
-            # Cache the result
-            self.classification_cache[cache_key] = classification
-            
             # Log the routing decision
             if logging_service:
                 logging_service.log_activity(
@@ -171,28 +172,83 @@ class CommandRouter:
                 reasoning=f"Error in routing: {str(e)}"
             )
     
-    def _classify_command(self, message: str, context: Dict[str, Any]) -> CommandClassification:
-        """Classify a command using keyword matching and LLM fallback"""
-        message_lower = message.lower()
+    def _normalize_message(self, message: str) -> str:
+        """Normalize a message for rule-match caching (rules ignore case and spacing)"""
+        return ' '.join(message.lower().split())
+    
+    def _cached_classify(self, message: str, user_id: Optional[str], context: Dict[str, Any]) -> CommandClassification:
+        """Classify a command, reusing cached rule matches and LLM classifications"""
+        normalized = self._normalize_message(message)
+        
+        # Rule matches do not depend on the user, so they are shared across users;
+        # parameters are re-extracted because they keep the original message text
+        rule_match = self.classification_cache.get(('rule', normalized), count=False)
+        if rule_match is not None:
+            self.classification_cache.record_lookup(hit=True)
+            rule, confidence = rule_match
+            return self._rule_classification(message, rule, confidence)
         
-        # First, try keyword and pattern matching
-        for rule in sorted(self.routing_rules, key=lambda x: x.priority, reverse=True):
-            confidence = self._calculate_rule_confidence(message_lower, rule)
+        llm_key = ('llm', message, user_id)
+        classification = self.classification_cache.get(llm_key, count=False)
+        # One hit or miss per classification, however many keys were consulted
+        self.classification_cache.record_lookup(hit=classification is not None)
+        if classification is not None:
+            return classification
+        
+        rule_match = self._match_rules(normalized)
+        if rule_match is not None:
+            self.classification_cache.set(('rule', normalized), rule_match)
+            return self._rule_classification(message, *rule_match)
+        
+        # If no high-confidence match, use LLM classification
+        classification = self._llm_classify_command(message, context)
+        self.classification_cache.set(llm_key, classification)
+        return classification
+    
+    def _build_rule_matcher(self):
+        """
+        Sort the routing rules once and precompile their keywords and patterns
+        
+        Every distinct keyword across all rules is checked against the message
+        in a single scan; each rule's keyword score is then a set intersection,
+        and its patterns only run when the rule can still clear the threshold.
+        """
+        self.sorted_rules = sorted(self.routing_rules, key=lambda x: x.priority, reverse=True)
+        self.compiled_rules: List[Tuple[RoutingRule, FrozenSet[str], List[Pattern]]] = [
+            (
+                rule,
+                frozenset(keyword.lower() for keyword in rule.keywords),
+                [re.compile(pattern, re.IGNORECASE) for pattern in rule.patterns]
+            )
+            for rule in self.sorted_rules
+        ]
+        self.rule_keywords = frozenset().union(*(keywords for _, keywords, _ in self.compiled_rules))
+    
+    def _match_rules(self, message_lower: str) -> Optional[Tuple[RoutingRule, float]]:
+        """Find the highest-priority rule matching with high confidence"""
+        present = {keyword for keyword in self.rule_keywords if keyword in message_lower}
+        
+        for rule, keywords, patterns in self.compiled_rules:
+            confidence = self._calculate_rule_confidence(message_lower, rule, present, keywords, patterns)
             
             if confidence > 0.7:  # High confidence threshold
-                return CommandClassification(
-                    command_type=rule.command_type,
-                    confidence=confidence,
-                    handler=rule.handler,
-                    parameters=self._extract_parameters(message, rule),
-                    reasoning=f"Keyword/pattern match with {confidence:.2f} confidence"
-                )
+                return rule, confidence
         
-        # If no high-confidence match, use LLM classification
-        return self._llm_classify_command(message, context)
+        return None
     
-    def _calculate_rule_confidence(self, message: str, rule: RoutingRule) -> float:
-        """Calculate confidence score for a routing rule"""
+    def _rule_classification(self, message: str, rule: RoutingRule, confidence: float) -> CommandClassification:
+        """Build the classification for a rule match"""
+        return CommandClassification(
+            command_type=rule.command_type,
+            confidence=confidence,
+            handler=rule.handler,
+            parameters=self._extract_parameters(message, rule),
+            reasoning=f"Keyword/pattern match with {confidence:.2f} confidence"
+        )
+    
+    def _calculate_rule_confidence(self, message: str, rule: RoutingRule, present: Set[str],
+                                   keywords: FrozenSet[str], patterns: List[Pattern]) -> float:
+        """Calculate confidence score for a routing rule from the keywords present in the message"""
         if rule.command_type == CommandType.CHAT and not rule.keywords:
             return 0.1  # Default chat has low confidence
         
@@ -200,14 +256,17 @@ class CommandRouter:
         pattern_score = 0.0
         
         # Check keywords
-        if rule.keywords:
-            keyword_matches = sum(1 for keyword in rule.keywords if keyword.lower() in message)
-            keyword_score = keyword_matches / len(rule.keywords)
+        if keywords:
+            keyword_score = len(keywords & present) / len(keywords)
+            
+            # Even a full pattern score could not lift the rule over the threshold
+            if patterns and (keyword_score + 1.0) / 2 <= 0.7:
+                return (keyword_score + pattern_score) / 2
         
         # Check patterns
-        if rule.patterns:
-            pattern_matches = sum(1 for pattern in rule.patterns if re.search(pattern, message, re.IGNORECASE))
-            pattern_score = pattern_matches / len(rule.patterns)
+        if patterns:
+            pattern_matches = sum(1 for pattern in patterns if pattern.search(message))
+            pattern_score = pattern_matches / len(patterns)
         
         # Combine scores
         if rule.keywords and rule.patterns:
@@ -462,17 +521,19 @@ class CommandRouter:
     
     def get_routing_statistics(self) -> Dict[str, Any]:
         """Get command routing statistics"""
-        # Count classifications by type
+        # Count cached classifications by type
         type_counts = {}
-        for classification in self.classification_cache.values():
-            command_type = classification.command_type.value
-            type_counts[command_type] = type_counts.get(command_type, 0) + 1
+        cached = self.classification_cache.values()
+        for entry in cached:
+            command_type = entry[0].command_type if isinstance(entry, tuple) else entry.command_type
+            type_counts[command_type.value] = type_counts.get(command_type.value, 0) + 1
         
         return {
-            "total_classifications": len(self.classification_cache),
+            "total_classifications": len(cached),
             "type_distribution": type_counts,
             "routing_rules": len(self.routing_rules),
-            "cache_size": len(self.classification_cache)
+            "cache_size": len(self.classification_cache),
+            "cache": self.classification_cache.get_stats()
         }
     
     def clear_cache(self):
@@ -483,6 +544,8 @@ class CommandRouter:
         """Add a new routing rule"""
         self.routing_rules.append(rule)
         self.routing_rules.sort(key=lambda x: x.priority, reverse=True)
+        self._build_rule_matcher()
+        self.clear_cache()
     
     def remove_routing_rule(self, command_type: CommandType, handler: str):
         """Remove a routing rule"""
@@ -490,6 +553,8 @@ class CommandRouter:
             rule for rule in self.routing_rules
             if not (rule.command_type == command_type and rule.handler == handler)
         ]
+        self._build_rule_matcher()
+        self.clear_cache()
 
 # Global instance
 command_router = CommandRouter()
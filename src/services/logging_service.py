@@ -3,15 +3,24 @@ Comprehensive Logging Service for Jarvis AI Assistant
 Provides activity logging, audit trails, performance monitoring, and workflow tracking.
 """
 
+import gzip
 import json
+import sys
+import threading
 import time
 import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any
 import os
-from dataclasses import dataclass, asdict
+from contextlib import contextmanager
 from enum import Enum
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file lock
+    fcntl = None
+
 class LogLevel(Enum):
     DEBUG = "debug"
     INFO = "info"
@@ -29,65 +38,142 @@ class LogCategory(Enum):
     WORKFLOW = "workflow"
     ERROR = "error"
 
-@dataclass
-class LogEntry:
-    id: str
-    timestamp: datetime
-    level: LogLevel
-    category: LogCategory
-    user_id: str
-    session_id: str
-    action: str
-    details: Dict[str, Any]
-    duration_ms: Optional[int] = None
-    success: bool = True
-    error_message: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+def _intern(value: Any) -> Any:
+    """Intern string identifiers; other values (e.g. numeric IDs from clients) pass through"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _LogRecord:
+    """Compact in-memory log record.
+    
+    Timestamps are kept as epoch floats and level/category/user/session as
+    interned strings so filtering compares cheaply; enum and datetime views
+    are produced on access, and dicts only at the API boundary.
+    """
+    __slots__ = ('id', 'ts', 'level_value', 'category_value', 'user_id', 'session_id',
+                 'action', 'details', 'duration_ms', 'success', 'error_message', 'metadata')
+    
+    def __init__(self, id: str, ts: float, level_value: str, category_value: str,
+                 user_id: str, session_id: str, action: str, details: Dict[str, Any],
+                 duration_ms: Optional[int] = None, success: bool = True,
+                 error_message: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.ts = ts
+        self.level_value = level_value
+        self.category_value = category_value
+        self.user_id = _intern(user_id)
+        self.session_id = _intern(session_id)
+        self.action = action
+        self.details = details
+        self.duration_ms = duration_ms
+        self.success = success
+        self.error_message = error_message
+        self.metadata = metadata
+    
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.ts)
+    
+    @property
+    def level(self) -> LogLevel:
+        return LogLevel(self.level_value)
+    
+    @property
+    def category(self) -> LogCategory:
+        return LogCategory(self.category_value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary"""
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp.isoformat(),
+            "level": self.level_value,
+            "category": self.category_value,
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "action": self.action,
+            "details": self.details,
+            "duration_ms": self.duration_ms,
+            "success": self.success,
+            "error_message": self.error_message,
+            "metadata": self.metadata
+        }
 
 class LoggingService:
+    LOG_FILE_PREFIX = "jarvis_logs_"
+    MAINTENANCE_LOCK_FILE = ".maintenance.lock"
+    COMPRESSING_SUFFIX = ".compressing"
+    
     def __init__(self, log_dir: str = "logs", max_log_files: int = 100):
         self.log_dir = log_dir
         self.max_log_files = max_log_files
-        self.logs: List[LogEntry] = []
+        
+        # Retention policy for daily log files
+        self.retention_days = int(os.getenv('LOG_FILE_RETENTION_DAYS', '30'))
+        self.max_total_bytes = int(os.getenv('LOG_MAX_TOTAL_MB', '500')) * 1024 * 1024
+        self.maintenance_interval = int(os.getenv('LOG_MAINTENANCE_INTERVAL', '3600'))  # seconds
+        self.maintenance_delay = int(os.getenv('LOG_MAINTENANCE_INITIAL_DELAY', '600'))  # seconds after startup
+        self.compress_grace = int(os.getenv('LOG_COMPRESS_GRACE', '300'))  # seconds since a closed day's last write
         self.max_memory_logs = 1000  # Keep last 1000 logs in memory
+        self.logs: Deque[_LogRecord] = deque(maxlen=self.max_memory_logs)
         
         # Create logs directory if it doesn't exist
         os.makedirs(log_dir, exist_ok=True)
         
         # Load recent logs from files
         self._load_recent_logs()
+        
+        # Compress closed days and enforce retention in the background
+        self._start_maintenance_thread()
+    
+    def _log_file_date(self, filename: str) -> Optional[str]:
+        """Return the YYYY-MM-DD date of a daily log file, or None if not a log file"""
+        if not filename.startswith(self.LOG_FILE_PREFIX):
+            return None
+        
+        for suffix in ('.json.gz', '.json'):
+            if filename.endswith(suffix):
+                return filename[len(self.LOG_FILE_PREFIX):-len(suffix)]
+        return None
+    
+    def _list_log_files(self) -> List[str]:
+        """List daily log files (plain and compressed) ordered by date"""
+        log_files = [f for f in os.listdir(self.log_dir) if self._log_file_date(f)]
+        # Within a day, the compressed part precedes any plain tail written after compression
+        return sorted(log_files, key=lambda f: (self._log_file_date(f), not f.endswith('.gz')))
+    
+    def _open_log_file(self, file_path: str):
+        """Open a daily log file for reading, decompressing transparently"""
+        if file_path.endswith('.gz'):
+            return gzip.open(file_path, 'rt')
+        return open(file_path, 'r')
     
     def _load_recent_logs(self):
         """Load recent logs from files into memory"""
         try:
-            log_files = sorted([f for f in os.listdir(self.log_dir) if f.endswith('.json')])
+            log_files = self._list_log_files()
             
             # Load from most recent files
             for log_file in log_files[-5:]:  # Load last 5 files
                 file_path = os.path.join(self.log_dir, log_file)
                 try:
-                    with open(file_path, 'r') as f:
+                    with self._open_log_file(file_path) as f:
                         for line in f:
                             if line.strip():
                                 log_data = json.loads(line)
-                                log_entry = self._dict_to_log_entry(log_data)
-                                self.logs.append(log_entry)
+                                self.logs.append(self._dict_to_record(log_data))
                 except Exception as e:
                     print(f"Error loading log file {log_file}: {e}")
-            
-            # Keep only recent logs in memory
-            self.logs = self.logs[-self.max_memory_logs:]
-            
+        
         except Exception as e:
             print(f"Error loading logs: {e}")
     
-    def _dict_to_log_entry(self, data: Dict) -> LogEntry:
-        """Convert dictionary to LogEntry object"""
-        return LogEntry(
+    def _dict_to_record(self, data: Dict) -> _LogRecord:
+        """Convert dictionary to an in-memory log record"""
+        return _LogRecord(
             id=data['id'],
-            timestamp=datetime.fromisoformat(data['timestamp']),
-            level=LogLevel(data['level']),
-            category=LogCategory(data['category']),
+            ts=datetime.fromisoformat(data['timestamp']).timestamp(),
+            level_value=LogLevel(data['level']).value,
+            category_value=LogCategory(data['category']).value,
             user_id=data['user_id'],
             session_id=data['session_id'],
             action=data['action'],
@@ -98,27 +184,19 @@ class LoggingService:
             metadata=data.get('metadata')
         )
     
-    def _log_entry_to_dict(self, entry: LogEntry) -> Dict:
-        """Convert LogEntry to dictionary for serialization"""
-        data = asdict(entry)
-        data['timestamp'] = entry.timestamp.isoformat()
-        data['level'] = entry.level.value
-        data['category'] = entry.category.value
-        return data
-    
-    def _write_to_file(self, entry: LogEntry):
+    def _write_to_file(self, entry: _LogRecord):
         """Write log entry to file"""
         try:
             # Create filename based on date
             date_str = entry.timestamp.strftime("%Y-%m-%d")
-            filename = f"jarvis_logs_{date_str}.json"
+            filename = f"{self.LOG_FILE_PREFIX}{date_str}.json"
             filepath = os.path.join(self.log_dir, filename)
             
             # Append to file
             with open(filepath, 'a') as f:
-                json.dump(self._log_entry_to_dict(entry), f)
+                json.dump(entry.to_dict(), f)
                 f.write('\n')
-                
+        
         except Exception as e:
             print(f"Error writing to log file: {e}")
     
@@ -135,11 +213,11 @@ class LoggingService:
             metadata: Optional[Dict[str, Any]] = None):
         """Log an activity"""
         
-        entry = LogEntry(
+        entry = _LogRecord(
             id=str(uuid.uuid4()),
-            timestamp=datetime.now(),
-            level=level,
-            category=category,
+            ts=time.time(),
+            level_value=level.value,
+            category_value=category.value,
             user_id=user_id,
             session_id=session_id,
             action=action,
@@ -150,13 +228,9 @@ class LoggingService:
             metadata=metadata
         )
         
-        # Add to memory
+        # Add to memory (the deque drops the oldest entry once full)
         self.logs.append(entry)
         
-        # Keep memory logs limited
-        if len(self.logs) > self.max_memory_logs:
-            self.logs = self.logs[-self.max_memory_logs:]
-        
         # Write to file
         self._write_to_file(entry)
         
@@ -255,6 +329,17 @@ class LoggingService:
             details=details or {}
         )
     
+    def log_activity(self, user_id: str, action: str, details: Optional[Dict[str, Any]] = None):
+        """Log a general service activity"""
+        return self.log(
+            level=LogLevel.INFO,
+            category=LogCategory.SYSTEM,
+            action=action,
+            user_id=user_id,
+            session_id="system",
+            details=details or {}
+        )
+    
     def log_error(self, error_type: str, error_message: str, user_id: str = "system",
                  session_id: str = "system", details: Optional[Dict[str, Any]] = None):
         """Log errors"""
@@ -276,32 +361,27 @@ class LoggingService:
                 level: Optional[LogLevel] = None,
                 start_time: Optional[datetime] = None,
                 end_time: Optional[datetime] = None,
-                limit: int = 100) -> List[LogEntry]:
+                limit: int = 100) -> List[_LogRecord]:
         """Get filtered logs"""
         
-        filtered_logs = self.logs
-        
-        # Apply filters
-        if user_id:
-            filtered_logs = [log for log in filtered_logs if log.user_id == user_id]
-        
-        if session_id:
-            filtered_logs = [log for log in filtered_logs if log.session_id == session_id]
+        category_value = category.value if category else None
+        level_value = level.value if level else None
+        start_ts = start_time.timestamp() if start_time else None
+        end_ts = end_time.timestamp() if end_time else None
         
-        if category:
-            filtered_logs = [log for log in filtered_logs if log.category == category]
-        
-        if level:
-            filtered_logs = [log for log in filtered_logs if log.level == level]
-        
-        if start_time:
-            filtered_logs = [log for log in filtered_logs if log.timestamp >= start_time]
-        
-        if end_time:
-            filtered_logs = [log for log in filtered_logs if log.timestamp <= end_time]
+        # Single pass over the buffer comparing interned strings and floats
+        filtered_logs = [
+            log for log in self.logs
+            if (not user_id or log.user_id == user_id)
+            and (not session_id or log.session_id == session_id)
+            and (category_value is None or log.category_value == category_value)
+            and (level_value is None or log.level_value == level_value)
+            and (start_ts is None or log.ts >= start_ts)
+            and (end_ts is None or log.ts <= end_ts)
+        ]
         
         # Sort by timestamp (newest first) and limit
-        filtered_logs.sort(key=lambda x: x.timestamp, reverse=True)
+        filtered_logs.sort(key=lambda x: x.ts, reverse=True)
         return filtered_logs[:limit]
     
     def get_statistics(self, 
@@ -331,11 +411,11 @@ class LoggingService:
         
         for log in logs:
             # Count by category
-            category_key = log.category.value
+            category_key = log.category_value
             stats["by_category"][category_key] = stats["by_category"].get(category_key, 0) + 1
             
             # Count by level
-            level_key = log.level.value
+            level_key = log.level_value
             stats["by_level"][level_key] = stats["by_level"].get(level_key, 0) + 1
             
             # Count by user
@@ -345,7 +425,7 @@ class LoggingService:
             stats["by_session"][log.session_id] = stats["by_session"].get(log.session_id, 0) + 1
             
             # Track tool usage
-            if log.category == LogCategory.TOOL and "tool_name" in log.details:
+            if log.category_value == LogCategory.TOOL.value and "tool_name" in log.details:
                 tool_name = log.details["tool_name"]
                 stats["tool_usage"][tool_name] = stats["tool_usage"].get(tool_name, 0) + 1
             
@@ -381,37 +461,199 @@ class LoggingService:
         
         activity = []
         for log in recent_logs:
-            activity.append({
-                "id": log.id,
-                "timestamp": log.timestamp.isoformat(),
-                "level": log.level.value,
-                "category": log.category.value,
-                "action": log.action,
-                "user_id": log.user_id,
-                "session_id": log.session_id,
-                "success": log.success,
-                "duration_ms": log.duration_ms,
-                "details": log.details
-            })
+            data = log.to_dict()
+            del data["error_message"], data["metadata"]
+            activity.append(data)
         
         return activity
     
     def cleanup_old_logs(self, days_to_keep: int = 30):
         """Clean up old log files"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+            cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).strftime("%Y-%m-%d")
             
+            for filename in self._list_log_files():
+                if self._log_file_date(filename) < cutoff_date:
+                    os.remove(os.path.join(self.log_dir, filename))
+                    print(f"Removed old log file: {filename}")
+        
+        except Exception as e:
+            print(f"Error cleaning up logs: {e}")
+    
+    @contextmanager
+    def _maintenance_lock(self):
+        """Hold the log directory's maintenance lock; yields False if another process has it"""
+        if fcntl is None:
+            yield True
+            return
+        
+        with open(os.path.join(self.log_dir, self.MAINTENANCE_LOCK_FILE), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def compress_closed_logs(self) -> int:
+        """Gzip daily log files for days that are over, returning how many were compressed"""
+        with self._maintenance_lock() as acquired:
+            if not acquired:
+                return 0
+            
+            today = datetime.now().strftime("%Y-%m-%d")
+            compressed = 0
+            
+            # Sources left behind by a pass that stopped part way
             for filename in os.listdir(self.log_dir):
-                if filename.endswith('.json'):
-                    filepath = os.path.join(self.log_dir, filename)
-                    file_time = datetime.fromtimestamp(os.path.getctime(filepath))
+                if filename.startswith(self.LOG_FILE_PREFIX) and filename.endswith('.json' + self.COMPRESSING_SUFFIX):
+                    compressed += self._compress_log_file(os.path.join(self.log_dir, filename))
+            
+            for filename in self._list_log_files():
+                if not filename.endswith('.json') or self._log_file_date(filename) >= today:
+                    continue
+                
+                filepath = os.path.join(self.log_dir, filename)
+                try:
+                    # Leave a day alone while writes stamped just before midnight may still land
+                    if time.time() - os.path.getmtime(filepath) < self.compress_grace:
+                        continue
                     
-                    if file_time < cutoff_date:
-                        os.remove(filepath)
-                        print(f"Removed old log file: {filename}")
-                        
+                    # New writes for this day now start a fresh plain tail instead of racing the copy
+                    source_path = filepath + self.COMPRESSING_SUFFIX
+                    os.rename(filepath, source_path)
+                except FileNotFoundError:
+                    continue
+                
+                compressed += self._compress_log_file(source_path)
+            
+            return compressed
+    
+    def _compress_log_file(self, source_path: str) -> int:
+        """
+        Fold a renamed plain log file into its day's archive; returns 1 on success
+        
+        The archive is rebuilt in a temp file (existing members, then the source
+        as a new member), fsynced, read back in full and swapped in with
+        os.replace, so a crash or failure never leaves a truncated archive and
+        the source is only deleted once its lines are durably archived.
+        """
+        archive_path = source_path[:-len(self.COMPRESSING_SUFFIX)] + '.gz'
+        temp_path = archive_path + '.tmp'
+        
+        try:
+            with open(source_path, 'rb') as src:
+                source_data = src.read()
+            
+            existing = b''
+            if os.path.exists(archive_path):
+                with open(archive_path, 'rb') as f:
+                    existing = f.read()
+                # A previous pass archived this source but stopped before deleting it
+                if source_data and gzip.decompress(existing).endswith(source_data):
+                    os.remove(source_path)
+                    return 1
+            
+            with open(temp_path, 'wb') as dst:
+                dst.write(existing)
+                dst.write(gzip.compress(source_data))
+                dst.flush()
+                os.fsync(dst.fileno())
+            
+            with gzip.open(temp_path, 'rb') as check:
+                archived = check.read()
+            if not archived.endswith(source_data):
+                raise IOError("archive does not contain the source after compression")
+            
+            os.replace(temp_path, archive_path)
+            self._fsync_dir()
+            os.remove(source_path)
+            return 1
+        
         except Exception as e:
-            print(f"Error cleaning up logs: {e}")
+            print(f"Error compressing log file {os.path.basename(source_path)}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return 0
+    
+    def _fsync_dir(self):
+        """Make renames in the log directory durable"""
+        try:
+            dir_fd = os.open(self.log_dir, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+    
+    def enforce_retention(self) -> int:
+        """Delete the oldest log files beyond the age, count and total size limits"""
+        with self._maintenance_lock() as acquired:
+            if not acquired:
+                return 0
+            return self._enforce_retention()
+    
+    def _enforce_retention(self) -> int:
+        removed = 0
+        try:
+            self.cleanup_old_logs(days_to_keep=self.retention_days)
+            
+            today = datetime.now().strftime("%Y-%m-%d")
+            log_files = self._list_log_files()
+            sizes = {}
+            for filename in log_files:
+                try:
+                    sizes[filename] = os.path.getsize(os.path.join(self.log_dir, filename))
+                except FileNotFoundError:
+                    sizes[filename] = 0
+            total_bytes = sum(sizes.values())
+            
+            # Oldest first; today's file is never removed
+            for filename in log_files:
+                if self._log_file_date(filename) >= today:
+                    break
+                if total_bytes <= self.max_total_bytes and len(log_files) - removed <= self.max_log_files:
+                    break
+                try:
+                    os.remove(os.path.join(self.log_dir, filename))
+                    print(f"Removed log file over retention limit: {filename}")
+                except FileNotFoundError:
+                    pass
+                total_bytes -= sizes[filename]
+                removed += 1
+        
+        except Exception as e:
+            print(f"Error enforcing log retention: {e}")
+        
+        return removed
+    
+    def run_maintenance(self):
+        """Compress closed days and apply the retention policy"""
+        self.compress_closed_logs()
+        self.enforce_retention()
+    
+    def _start_maintenance_thread(self):
+        """Start background thread for log compression and retention"""
+        def maintenance_loop():
+            # Not on import: let startup (and short-lived scripts) finish first
+            time.sleep(self.maintenance_delay)
+            while True:
+                try:
+                    self.run_maintenance()
+                except Exception as e:
+                    print(f"Log maintenance error: {e}")
+                time.sleep(self.maintenance_interval)
+        
+        thread = threading.Thread(target=maintenance_loop, daemon=True)
+        thread.start()
 
 # Global logging service instance
 logging_service = LoggingService()
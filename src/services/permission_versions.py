@@ -0,0 +1,118 @@
+"""
+Permission Version Store for Jarvis AI Assistant
+Shared SQLite change feed that tells every worker process which cached user
+permissions are stale after a role or user change.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+class PermissionVersionStore:
+    """Per-scope version numbers with a sequence feed for cross-worker cache invalidation"""
+    
+    GLOBAL_SCOPE = "*"  # Invalidates every cached user
+    
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('RBAC_VERSION_DB', os.path.join('state', 'rbac_versions.db'))
+        self.poll_interval = float(os.getenv('RBAC_VERSION_POLL_INTERVAL', '1'))  # seconds
+        self.lock = threading.Lock()
+        self.last_seq = 0
+        self.last_poll = 0.0
+        self.available = False
+        
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS permission_versions (
+                        scope TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL,
+                        seq INTEGER NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_permission_versions_seq ON permission_versions (seq)')
+                
+                # Changes made before this process started cannot affect its (empty) cache
+                self.last_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM permission_versions').fetchone()[0]
+            self.available = True
+        except Exception as e:
+            print(f"Permission version store unavailable, falling back to cache expiry: {e}")
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction (committed on success) and close it afterwards"""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def bump(self, scope: str) -> Optional[int]:
+        """Record a change for a scope (a user ID or GLOBAL_SCOPE); returns its new version"""
+        if not self.available:
+            return None
+        
+        try:
+            with self._connect() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM permission_versions').fetchone()[0]
+                conn.execute('''
+                    INSERT INTO permission_versions (scope, version, seq) VALUES (?, 1, ?)
+                    ON CONFLICT(scope) DO UPDATE SET version = version + 1, seq = excluded.seq
+                ''', (scope, seq))
+                return conn.execute('SELECT version FROM permission_versions WHERE scope = ?', (scope,)).fetchone()[0]
+        except Exception as e:
+            print(f"Error recording permission change for {scope}: {e}")
+            return None
+    
+    def bump_user(self, user_id: str) -> Optional[int]:
+        return self.bump(user_id)
+    
+    def bump_all(self) -> Optional[int]:
+        return self.bump(self.GLOBAL_SCOPE)
+    
+    def poll_changes(self, force: bool = False) -> Set[str]:
+        """
+        Scopes changed (by any process) since the last poll
+        
+        Polls at most once per poll interval unless forced, so permission
+        checks only touch the database about once a second per worker.
+        """
+        if not self.available:
+            return set()
+        
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_poll < self.poll_interval:
+                return set()
+            self.last_poll = now
+            
+            try:
+                with self._connect() as conn:
+                    rows = conn.execute(
+                        'SELECT scope, seq FROM permission_versions WHERE seq > ?', (self.last_seq,)
+                    ).fetchall()
+            except Exception as e:
+                print(f"Error polling permission changes: {e}")
+                return set()
+            
+            if rows:
+                self.last_seq = max(seq for _, seq in rows)
+            return {scope for scope, _ in rows}
+    
+    def get_versions(self) -> Dict[str, int]:
+        """Current version per scope"""
+        if not self.available:
+            return {}
+        
+        with self._connect() as conn:
+            return dict(conn.execute('SELECT scope, version FROM permission_versions').fetchall())
+
+# Global permission version store
+permission_versions = PermissionVersionStore()
@@ -7,13 +7,14 @@ import os
 import json
 import jwt
 import requests
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, Iterable, List, Any, Optional, Set
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 
 from .user_service import user_service
 from .logging_service import logging_service
+from .permission_versions import permission_versions
 
 class Permission(Enum):
     # Basic permissions
@@ -59,6 +60,31 @@ class Permission(Enum):
     ADMIN_PANEL = "admin_panel"
     FULL_ACCESS = "full_access"
 
+# Bit position of each permission, assigned once so roles and users hold integer masks
+PERMISSION_BITS: Dict[Permission, int] = {permission: 1 << index for index, permission in enumerate(Permission)}
+
+# Permissions required per command type (any one suffices)
+COMMAND_PERMISSIONS: Dict[str, List[Permission]] = {
+    'chat': [Permission.CHAT],
+    'tool': [Permission.TOOL_USAGE],
+    'file_operation': [Permission.FILE_UPLOAD],
+    'workflow': [Permission.WORKFLOW_EXECUTION],
+    'plugin': [Permission.PLUGIN_EXECUTION],
+    'system': [Permission.SYSTEM_ACCESS],
+    'webhook': []  # No permission required
+}
+
+def permissions_to_mask(permissions: Iterable[Permission]) -> int:
+    """Combine permissions into a bit mask"""
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS[permission]
+    return mask
+
+def mask_to_permissions(mask: int) -> Set[Permission]:
+    """Expand a bit mask back into the permissions it holds"""
+    return {permission for permission, bit in PERMISSION_BITS.items() if mask & bit}
+
 class Role(Enum):
     GUEST = "guest"
     USER = "user"
@@ -74,16 +100,36 @@ class RoleDefinition:
     description: str
     permissions: Set[Permission]
     inherits_from: Optional['RoleDefinition'] = None
+    mask: int = 0
+    
+    def __post_init__(self):
+        self.mask = permissions_to_mask(self.permissions)
 
 @dataclass
 class UserPermissions:
-    """User permissions with context"""
+    """User permissions with context, held as permission bit masks"""
     user_id: str
     role: Role
-    permissions: Set[Permission]
-    custom_permissions: Set[Permission]
-    restrictions: Set[Permission]
+    mask: int
+    custom_mask: int = 0
+    restriction_mask: int = 0
     expires_at: Optional[datetime] = None
+    
+    def has(self, permission: Permission) -> bool:
+        """Check a single permission with one bitwise AND"""
+        return bool(self.mask & PERMISSION_BITS[permission])
+    
+    @property
+    def permissions(self) -> Set[Permission]:
+        return mask_to_permissions(self.mask)
+    
+    @property
+    def custom_permissions(self) -> Set[Permission]:
+        return mask_to_permissions(self.custom_mask)
+    
+    @property
+    def restrictions(self) -> Set[Permission]:
+        return mask_to_permissions(self.restriction_mask)
 
 class RBACManager:
     """Enhanced Role-Based Access Control Manager"""
@@ -91,6 +137,14 @@ class RBACManager:
     def __init__(self):
         self.role_definitions = self._initialize_role_definitions()
         self.user_permissions_cache: Dict[str, UserPermissions] = {}
+        
+        # Role and user changes invalidate entries through the shared version store,
+        # so the expiry is only a backstop
+        self.cache_ttl = int(os.getenv('RBAC_CACHE_TTL', '86400'))  # seconds
+        self.permission_versions = permission_versions
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_invalidations = 0
         self.google_oauth_config = self._load_oauth_config()
         
         print("✅ RBAC manager initialized")
@@ -253,31 +307,42 @@ class RBACManager:
     
     def get_user_permissions(self, user_id: str, force_refresh: bool = False) -> UserPermissions:
         """Get user permissions with caching"""
+        self._apply_permission_changes()
         
         # Check cache first
         if not force_refresh and user_id in self.user_permissions_cache:
             cached = self.user_permissions_cache[user_id]
             if not cached.expires_at or cached.expires_at > datetime.now():
+                self.cache_hits += 1
                 return cached
         
+        self.cache_misses += 1
+        
         # Get user from user service
         try:
-            user = user_service.get_user(user_id)
+            user = user_service.get_user_by_id(user_id)
             if not user:
-                # Default to guest for unknown users
-                role = Role.GUEST
-            else:
-                role = Role(user.get('role', 'user'))
+                # The user may have been created by another worker since this one loaded
+                user_service.reload_user(user_id)
+                user = user_service.get_user_by_id(user_id)
         except:
+            user = None
+        
+        if not user:
+            # Default to guest for unknown users
             role = Role.GUEST
+        else:
+            try:
+                role = Role(user.get('role', 'user'))
+            except ValueError:
+                role = Role.GUEST
         
         # Get role permissions
         role_def = self.role_definitions[role]
-        base_permissions = role_def.permissions.copy()
         
         # Add custom permissions (if any)
-        custom_permissions = set()
-        restrictions = set()
+        custom_mask = 0
+        restriction_mask = 0
         
         # TODO: Load custom permissions and restrictions from database
         
@@ -285,92 +350,153 @@ class RBACManager:
         user_permissions = UserPermissions(
             user_id=user_id,
             role=role,
-            permissions=base_permissions | custom_permissions - restrictions,
-            custom_permissions=custom_permissions,
-            restrictions=restrictions,
-            expires_at=datetime.now() + timedelta(hours=1)  # Cache for 1 hour
+            mask=role_def.mask | (custom_mask & ~restriction_mask),
+            custom_mask=custom_mask,
+            restriction_mask=restriction_mask,
+            expires_at=datetime.now() + timedelta(seconds=self.cache_ttl)
         )
         
-        # Cache the permissions
-        self.user_permissions_cache[user_id] = user_permissions
+        # Cache the permissions; not the guest fallback for an unknown user, so one
+        # that appears later is not stuck with it until the entry expires
+        if user:
+            self.user_permissions_cache[user_id] = user_permissions
         
         return user_permissions
     
+    def _apply_permission_changes(self):
+        """Drop cached entries for users whose roles changed in any worker"""
+        changed = self.permission_versions.poll_changes()
+        if not changed:
+            return
+        
+        # The change may come from another worker, whose user records this process has not loaded
+        if self.permission_versions.GLOBAL_SCOPE in changed:
+            user_service.reload_users()
+            self.cache_invalidations += len(self.user_permissions_cache)
+            self.user_permissions_cache.clear()
+            return
+        
+        for user_id in changed:
+            user_service.reload_user(user_id)
+            if self.user_permissions_cache.pop(user_id, None) is not None:
+                self.cache_invalidations += 1
+    
     def has_permission(self, user_id: str, permission: Permission) -> bool:
         """Check if user has specific permission"""
-        user_permissions = self.get_user_permissions(user_id)
-        return permission in user_permissions.permissions
+        return self.get_user_permissions(user_id).has(permission)
     
     def has_any_permission(self, user_id: str, permissions: List[Permission]) -> bool:
         """Check if user has any of the specified permissions"""
         user_permissions = self.get_user_permissions(user_id)
-        return any(perm in user_permissions.permissions for perm in permissions)
+        return bool(user_permissions.mask & permissions_to_mask(permissions))
     
     def has_all_permissions(self, user_id: str, permissions: List[Permission]) -> bool:
         """Check if user has all specified permissions"""
-        user_permissions = self.get_user_permissions(user_id)
-        return all(perm in user_permissions.permissions for perm in permissions)
+        required_mask = permissions_to_mask(permissions)
+        return self.get_user_permissions(user_id).mask & required_mask == required_mask
     
     def check_command_permission(self, user_id: str, command_type: str, command_data: Dict[str, Any] = None) -> bool:
         """Check if user has permission for specific command type"""
-        
-        permission_map = {
-            'chat': [Permission.CHAT],
-            'tool': [Permission.TOOL_USAGE],
-            'file_operation': [Permission.FILE_UPLOAD],
-            'workflow': [Permission.WORKFLOW_EXECUTION],
-            'plugin': [Permission.PLUGIN_EXECUTION],
-            'system': [Permission.SYSTEM_ACCESS]
-        }
-        
-        required_permissions = permission_map.get(command_type, [])
+        required_permissions = COMMAND_PERMISSIONS.get(command_type, [])
         
         if not required_permissions:
             return True  # Allow unknown command types
         
         return self.has_any_permission(user_id, required_permissions)
     
-    def get_accessible_tools(self, user_id: str) -> List[str]:
+    def get_accessible_tools(self, user_id: str, user_permissions: UserPermissions = None) -> List[str]:
         """Get list of tools accessible to user"""
-        user_permissions = self.get_user_permissions(user_id)
+        user_permissions = user_permissions or self.get_user_permissions(user_id)
         accessible_tools = []
         
-        if Permission.WEB_SEARCH in user_permissions.permissions:
+        if user_permissions.has(Permission.WEB_SEARCH):
             accessible_tools.append('web_search')
         
-        if Permission.WEATHER_LOOKUP in user_permissions.permissions:
+        if user_permissions.has(Permission.WEATHER_LOOKUP):
             accessible_tools.append('weather_lookup')
         
-        if Permission.URL_SCRAPING in user_permissions.permissions:
+        if user_permissions.has(Permission.URL_SCRAPING):
             accessible_tools.extend(['web_scraper', 'url_summarizer'])
         
-        if Permission.COMMAND_EXECUTION in user_permissions.permissions:
+        if user_permissions.has(Permission.COMMAND_EXECUTION):
             accessible_tools.append('command_executor')
         
         return accessible_tools
     
-    def get_accessible_workflows(self, user_id: str) -> List[str]:
+    def get_accessible_workflows(self, user_id: str, user_permissions: UserPermissions = None) -> List[str]:
         """Get list of workflows accessible to user"""
-        user_permissions = self.get_user_permissions(user_id)
+        user_permissions = user_permissions or self.get_user_permissions(user_id)
         
-        if Permission.WORKFLOW_MANAGEMENT in user_permissions.permissions:
+        if user_permissions.has(Permission.WORKFLOW_MANAGEMENT):
             return ['all']  # Admin can access all workflows
-        elif Permission.WORKFLOW_EXECUTION in user_permissions.permissions:
+        elif user_permissions.has(Permission.WORKFLOW_EXECUTION):
             return ['send_followup_email', 'daily_summary']  # User workflows
         else:
             return []
     
-    def get_accessible_plugins(self, user_id: str) -> List[str]:
+    def get_accessible_plugins(self, user_id: str, user_permissions: UserPermissions = None) -> List[str]:
         """Get list of plugins accessible to user"""
-        user_permissions = self.get_user_permissions(user_id)
+        user_permissions = user_permissions or self.get_user_permissions(user_id)
         
-        if Permission.PLUGIN_MANAGEMENT in user_permissions.permissions:
+        if user_permissions.has(Permission.PLUGIN_MANAGEMENT):
             return ['all']  # Admin can access all plugins
-        elif Permission.PLUGIN_EXECUTION in user_permissions.permissions:
+        elif user_permissions.has(Permission.PLUGIN_EXECUTION):
             return ['calculator', 'text_processor']  # Safe plugins for users
         else:
             return []
     
+    def check_permissions_batch(self, user_id: str, permissions: List[str] = None,
+                                resources: List[str] = None) -> Dict[str, Any]:
+        """
+        Check many permissions and resources for one user at once
+        
+        Everything is evaluated against a single cached permission lookup.
+        Resources are "tool:<name>", "workflow:<name>", "plugin:<name>" or
+        "command:<command type>"; unknown names are reported as invalid.
+        """
+        user_permissions = self.get_user_permissions(user_id)
+        permission_results = {}
+        resource_results = {}
+        invalid = []
+        
+        for name in permissions or []:
+            if not isinstance(name, str):
+                invalid.append(name)
+                continue
+            try:
+                permission_results[name] = user_permissions.has(Permission(name))
+            except ValueError:
+                invalid.append(name)
+        
+        accessible = {}
+        for resource in resources or []:
+            if not isinstance(resource, str):
+                invalid.append(resource)
+                continue
+            kind, _, name = resource.partition(':')
+            if kind == 'command' and name in COMMAND_PERMISSIONS:
+                required_mask = permissions_to_mask(COMMAND_PERMISSIONS[name])
+                resource_results[resource] = not required_mask or bool(user_permissions.mask & required_mask)
+            elif kind in ('tool', 'workflow', 'plugin') and name:
+                if kind not in accessible:
+                    lookup = {
+                        'tool': self.get_accessible_tools,
+                        'workflow': self.get_accessible_workflows,
+                        'plugin': self.get_accessible_plugins
+                    }[kind]
+                    accessible[kind] = set(lookup(user_id, user_permissions))
+                resource_results[resource] = 'all' in accessible[kind] or name in accessible[kind]
+            else:
+                invalid.append(resource)
+        
+        return {
+            "user_id": user_id,
+            "role": user_permissions.role.value,
+            "permissions": permission_results,
+            "resources": resource_results,
+            "invalid": invalid
+        }
+    
     def grant_permission(self, user_id: str, permission: Permission, granted_by: str) -> bool:
         """Grant custom permission to user"""
         try:
@@ -380,8 +506,8 @@ class RBACManager:
             
             # Add to custom permissions (would be stored in database)
             user_permissions = self.get_user_permissions(user_id)
-            user_permissions.custom_permissions.add(permission)
-            user_permissions.permissions.add(permission)
+            user_permissions.custom_mask |= PERMISSION_BITS[permission]
+            user_permissions.mask |= PERMISSION_BITS[permission]
             
             # Log the permission grant
             if logging_service:
@@ -410,8 +536,8 @@ class RBACManager:
             
             # Add to restrictions (would be stored in database)
             user_permissions = self.get_user_permissions(user_id)
-            user_permissions.restrictions.add(permission)
-            user_permissions.permissions.discard(permission)
+            user_permissions.restriction_mask |= PERMISSION_BITS[permission]
+            user_permissions.mask &= ~PERMISSION_BITS[permission]
             
             # Log the permission revocation
             if logging_service:
@@ -442,7 +568,7 @@ class RBACManager:
             success = user_service.update_user(user_id, {'role': new_role.value})
             
             if success:
-                # Clear permissions cache
+                # Clear permissions cache here; user_service publishes the change to other workers
                 if user_id in self.user_permissions_cache:
                     del self.user_permissions_cache[user_id]
                 
@@ -499,21 +625,23 @@ class RBACManager:
         return {
             "user_id": user_id,
             "role": role_info,
-            "total_permissions": len(user_permissions.permissions),
+            "total_permissions": user_permissions.mask.bit_count(),
             "custom_permissions": [perm.value for perm in user_permissions.custom_permissions],
             "restrictions": [perm.value for perm in user_permissions.restrictions],
-            "accessible_tools": self.get_accessible_tools(user_id),
-            "accessible_workflows": self.get_accessible_workflows(user_id),
-            "accessible_plugins": self.get_accessible_plugins(user_id)
+            "accessible_tools": self.get_accessible_tools(user_id, user_permissions),
+            "accessible_workflows": self.get_accessible_workflows(user_id, user_permissions),
+            "accessible_plugins": self.get_accessible_plugins(user_id, user_permissions)
         }
     
     def clear_permissions_cache(self, user_id: str = None):
-        """Clear permissions cache"""
+        """Clear permissions cache (in every worker)"""
         if user_id:
             if user_id in self.user_permissions_cache:
                 del self.user_permissions_cache[user_id]
+            self.permission_versions.bump_user(user_id)
         else:
             self.user_permissions_cache.clear()
+            self.permission_versions.bump_all()
     
     def get_rbac_statistics(self) -> Dict[str, Any]:
         """Get RBAC statistics"""
@@ -533,6 +661,13 @@ class RBACManager:
             "total_roles": len(Role),
             "total_permissions": len(Permission),
             "cached_users": len(self.user_permissions_cache),
+            "cache": {
+                "ttl_seconds": self.cache_ttl,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "invalidations": self.cache_invalidations,
+                "shared_invalidation": self.permission_versions.available
+            },
             "role_distribution": role_distribution,
             "oauth_configured": bool(self.google_oauth_config.get("client_id"))
         }
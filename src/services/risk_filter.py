@@ -4,15 +4,24 @@ Safety interceptor layer that analyzes commands for potential security risks.
 """
 
 import re
+import os
 import json
 import openai
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Pattern, Set, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 import hashlib
 
 from .logging_service import logging_service
+from .admin_notifier import admin_notifier
+from .security_event_store import SecurityEventStore
+from ..utils.ttl_cache import TTLCache
+
+TOKEN_PATTERN = re.compile(r'\w+')
+REGEX_METACHARACTERS = set('.^$*+?{}[]()|')
+# re.IGNORECASE also matches the dotless i against "i", which casefold() keeps distinct
+CASE_FOLD_FIXES = str.maketrans({'\u0131': 'i'})
 
 class RiskLevel(Enum):
     SAFE = "safe"
@@ -59,10 +68,18 @@ class RiskFilter:
     
     def __init__(self):
         self.openai_client = openai.OpenAI()
-        self.security_events: List[SecurityEvent] = []
+        self.event_store = SecurityEventStore()
+        self.admin_notifier = admin_notifier
         self.risk_patterns = self._initialize_risk_patterns()
+        self._build_pattern_scanner()
         self.blocked_commands_cache = set()
         
+        # AI verdicts per normalized command and user role; resent commands are decided locally
+        self.verdict_cache = TTLCache(
+            max_entries=int(os.getenv('RISK_VERDICT_CACHE_MAX_ENTRIES', '1024')),
+            ttl=float(os.getenv('RISK_VERDICT_CACHE_TTL', '3600'))
+        )
+        
         print("✅ Risk filter initialized")
     
     def _initialize_risk_patterns(self) -> Dict[RiskCategory, List[str]]:
@@ -145,7 +162,7 @@ class RiskFilter:
             
             # AI-powered deep assessment for medium+ risk
             if pattern_assessment.risk_level in [RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL]:
-                ai_assessment = self._ai_risk_assessment(command, context or {})
+                ai_assessment = self._cached_ai_assessment(command, user_id, context or {})
                 # Use the higher risk assessment
                 if ai_assessment.risk_level.value > pattern_assessment.risk_level.value:
                     final_assessment = ai_assessment
@@ -187,17 +204,132 @@ class RiskFilter:
                 metadata={"error": str(e)}
             )
     
+    def _build_pattern_scanner(self):
+        """
+        Compile the risk patterns once and index them by the literal text they require
+        
+        Every pattern that starts with literal text (a word such as "sudo" or a
+        fragment such as "--force") is only searched when that text occurs in the
+        input, so one tokenizing pass over the input selects the few patterns
+        worth running. Patterns without a literal prefix are always searched.
+        """
+        self.compiled_patterns: List[Tuple[RiskCategory, Pattern]] = []
+        self.word_triggers: Dict[str, List[int]] = {}
+        self.text_triggers: Dict[str, List[int]] = {}
+        self.ungated_patterns: List[int] = []
+        
+        for category, patterns in self.risk_patterns.items():
+            for pattern in patterns:
+                index = len(self.compiled_patterns)
+                self.compiled_patterns.append((category, re.compile(pattern, re.IGNORECASE)))
+                
+                triggers = self._pattern_triggers(pattern)
+                if triggers is None:
+                    self.ungated_patterns.append(index)
+                    continue
+                
+                literals, whole_word = triggers
+                trigger_index = self.word_triggers if whole_word else self.text_triggers
+                for literal in literals:
+                    trigger_index.setdefault(literal, []).append(index)
+    
+    def _pattern_triggers(self, pattern: str) -> Optional[Tuple[List[str], bool]]:
+        """
+        Get the literals one of which every match of a pattern must contain
+        
+        Returns (literals, whole_word), where whole_word means each literal is
+        matched as a complete word token, or None if the pattern has no literal
+        prefix on every branch.
+        """
+        word_start = pattern.startswith(r'\b')
+        body = pattern[2:] if word_start else pattern
+        
+        if body.startswith('(?:'):
+            close = body.find(')')
+            group = body[3:close]
+            if close == -1 or any(token in group for token in ('(', '[', '\\|')):
+                return None
+            alternatives = group.split('|')
+            rest = body[close + 1:]
+            if rest[:1] in ('?', '*', '{'):
+                return None  # Optional group
+        else:
+            alternatives = [body]
+            rest = ''
+        
+        literals = []
+        whole_word = word_start
+        for alternative in alternatives:
+            literal, following = self._literal_prefix(alternative)
+            if not literal:
+                return None
+            
+            following = following or rest
+            whole_word = whole_word and TOKEN_PATTERN.fullmatch(literal) is not None and \
+                following.startswith((r'\b', r'\s'))
+            literals.append(literal.lower())
+        
+        return literals, whole_word
+    
+    def _literal_prefix(self, pattern: str) -> Tuple[str, str]:
+        """Split a pattern into its leading literal text and the remainder"""
+        literal = ''
+        position = 0
+        while position < len(pattern):
+            char = pattern[position]
+            if char == '\\':
+                if position + 1 >= len(pattern) or pattern[position + 1].isalnum():
+                    break  # Character class escape such as \s or \d
+                char = pattern[position + 1]
+                step = 2
+            elif char in REGEX_METACHARACTERS:
+                break
+            else:
+                step = 1
+            
+            if pattern[position + step:position + step + 1] in ('?', '*', '{'):
+                break  # Quantified character may be absent
+            
+            literal += char
+            position += step
+        
+        return literal, pattern[position:]
+    
+    def _scan_patterns(self, command_lower: str) -> Dict[RiskCategory, int]:
+        """Count matching patterns per category, searching only triggered patterns"""
+        tokens = set(TOKEN_PATTERN.findall(command_lower))
+        folded = command_lower
+        if not command_lower.isascii():
+            # Patterns are case-insensitive, so fold look-alikes such as the long s first
+            tokens = {token.casefold().translate(CASE_FOLD_FIXES) for token in tokens}
+            folded = command_lower.casefold().translate(CASE_FOLD_FIXES)
+        
+        candidates: Set[int] = set(self.ungated_patterns)
+        for token in tokens:
+            indices = self.word_triggers.get(token)
+            if indices:
+                candidates.update(indices)
+        for literal, indices in self.text_triggers.items():
+            if literal in folded:
+                candidates.update(indices)
+        
+        category_matches: Dict[RiskCategory, int] = {}
+        for index in candidates:
+            category, pattern = self.compiled_patterns[index]
+            if pattern.search(command_lower):
+                category_matches[category] = category_matches.get(category, 0) + 1
+        
+        return category_matches
+    
     def _pattern_based_assessment(self, command: str) -> RiskAssessment:
         """Perform pattern-based risk assessment"""
         command_lower = command.lower()
+        category_matches = self._scan_patterns(command_lower)
         detected_categories = []
         risk_scores = []
         
         for category, patterns in self.risk_patterns.items():
-            category_score = 0
-            for pattern in patterns:
-                if re.search(pattern, command_lower, re.IGNORECASE):
-                    category_score += 1
+            category_score = category_matches.get(category, 0)
             
             if category_score > 0:
                 detected_categories.append(category)
@@ -233,6 +365,49 @@ class RiskFilter:
             metadata={"method": "pattern_based", "scores": risk_scores}
         )
     
+    def _verdict_cache_key(self, command: str, user_id: str, context: Dict[str, Any]) -> str:
+        """Hash the normalized command together with the user's role and the context sent to the model"""
+        normalized = ' '.join(command.lower().split())
+        context_json = json.dumps(context, sort_keys=True, default=str)
+        return hashlib.sha256(
+            f"{self._get_user_role(user_id)}\0{normalized}\0{context_json}".encode('utf-8')
+        ).hexdigest()
+    
+    def _get_user_role(self, user_id: str) -> str:
+        """Look up a user's role for verdict caching"""
+        try:
+            from .user_service import user_service
+            user = user_service.get_user_by_id(user_id)
+            return user.get('role', 'user') if user else 'anonymous'
+        except Exception:
+            return 'anonymous'
+    
+    def _cached_ai_assessment(self, command: str, user_id: str, context: Dict[str, Any]) -> RiskAssessment:
+        """Get the AI risk assessment, reusing a cached verdict for the same command, role and context"""
+        cache_key = self._verdict_cache_key(command, user_id, context)
+        cached = self.verdict_cache.get(cache_key)
+        if cached is not None:
+            # Copy so blocking decisions on this request never leak into the cache
+            return replace(
+                cached,
+                risk_categories=list(cached.risk_categories),
+                recommendations=list(cached.recommendations),
+                metadata={**cached.metadata, "cached": True}
+            )
+        
+        assessment = self._ai_risk_assessment(command, context)
+        
+        # Fallback estimates are not verdicts; retry the model next time
+        if assessment.metadata.get("method") == "ai_powered":
+            self.verdict_cache.set(cache_key, replace(
+                assessment,
+                risk_categories=list(assessment.risk_categories),
+                recommendations=list(assessment.recommendations),
+                metadata=dict(assessment.metadata)
+            ))
+        
+        return assessment
+    
     def _ai_risk_assessment(self, command: str, context: Dict[str, Any]) -> RiskAssessment:
         """Perform AI-powered risk assessment"""
         try:
@@ -364,11 +539,7 @@ class RiskFilter:
     
     def _log_security_event(self, event: SecurityEvent):
         """Log security event"""
-        self.security_events.append(event)
-        
-        # Keep only last 1000 events
-        if len(self.security_events) > 1000:
-            self.security_events = self.security_events[-1000:]
+        self.event_store.append(self._event_to_dict(event))
         
         # Log to main logging service
         if logging_service:
@@ -387,9 +558,8 @@ class RiskFilter:
             )
     
     def _send_admin_notification(self, event: SecurityEvent):
-        """Send notification to administrators for high-risk events"""
+        """Queue a notification to administrators for high-risk events (delivered in the background)"""
         try:
-            # This would integrate with notification systems (Slack, email, etc.)
             notification_data = {
                 "type": "security_alert",
                 "severity": event.risk_assessment.risk_level.value,
@@ -398,92 +568,48 @@ class RiskFilter:
                 "risk_categories": [cat.value for cat in event.risk_assessment.risk_categories],
                 "reasoning": event.risk_assessment.reasoning,
                 "timestamp": event.timestamp.isoformat(),
-                "action_taken": event.action_taken
+                "action_taken": event.action_taken,
+                "ip_address": event.ip_address
             }
             
-            # Log the notification attempt
-            if logging_service:
-                logging_service.log_activity(
-                    'system',
-                    'admin_notification_sent',
-                    notification_data
-                )
-            
-            print(f"🚨 SECURITY ALERT: {event.risk_assessment.risk_level.value} risk command from {event.user_id}")
+            self.admin_notifier.notify(notification_data)
             
         except Exception as e:
-            print(f"Failed to send admin notification: {e}")
+            print(f"Failed to queue admin notification: {e}")
     
-    def get_security_events(self, user_id: str = None, risk_level: RiskLevel = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get security events with optional filtering"""
-        events = self.security_events
-        
-        if user_id:
-            events = [e for e in events if e.user_id == user_id]
-        
-        if risk_level:
-            events = [e for e in events if e.risk_assessment.risk_level == risk_level]
-        
-        # Sort by timestamp (newest first)
-        events.sort(key=lambda x: x.timestamp, reverse=True)
-        
-        # Convert to dict format
-        return [
-            {
-                "timestamp": event.timestamp.isoformat(),
-                "user_id": event.user_id,
-                "command": event.command,
-                "risk_level": event.risk_assessment.risk_level.value,
-                "risk_categories": [cat.value for cat in event.risk_assessment.risk_categories],
-                "confidence": event.risk_assessment.confidence,
-                "reasoning": event.risk_assessment.reasoning,
-                "blocked": event.risk_assessment.blocked,
-                "action_taken": event.action_taken,
-                "ip_address": event.ip_address
-            }
-            for event in events[:limit]
-        ]
-    
-    def get_security_statistics(self) -> Dict[str, Any]:
-        """Get security statistics"""
-        if not self.security_events:
-            return {
-                "total_events": 0,
-                "risk_distribution": {},
-                "blocked_commands": 0,
-                "top_risk_categories": []
-            }
-        
-        # Risk level distribution
-        risk_distribution = {}
-        for event in self.security_events:
-            level = event.risk_assessment.risk_level.value
-            risk_distribution[level] = risk_distribution.get(level, 0) + 1
-        
-        # Blocked commands count
-        blocked_count = sum(1 for e in self.security_events if e.risk_assessment.blocked)
-        
-        # Top risk categories
-        category_counts = {}
-        for event in self.security_events:
-            for category in event.risk_assessment.risk_categories:
-                cat_name = category.value
-                category_counts[cat_name] = category_counts.get(cat_name, 0) + 1
-        
-        top_categories = sorted(category_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        
+    def _event_to_dict(self, event: SecurityEvent) -> Dict[str, Any]:
+        """Convert a security event to its stored and API dict format"""
         return {
-            "total_events": len(self.security_events),
-            "risk_distribution": risk_distribution,
-            "blocked_commands": blocked_count,
-            "block_rate": (blocked_count / len(self.security_events)) * 100,
-            "top_risk_categories": top_categories,
-            "recent_events_24h": len([
-                e for e in self.security_events
-                if (datetime.now() - e.timestamp).total_seconds() < 86400
-            ])
+            "timestamp": event.timestamp.isoformat(),
+            "user_id": event.user_id,
+            "command": event.command,
+            "risk_level": event.risk_assessment.risk_level.value,
+            "risk_categories": [cat.value for cat in event.risk_assessment.risk_categories],
+            "confidence": event.risk_assessment.confidence,
+            "reasoning": event.risk_assessment.reasoning,
+            "blocked": event.risk_assessment.blocked,
+            "action_taken": event.action_taken,
+            "ip_address": event.ip_address
         }
     
+    def get_security_events(self, user_id: str = None, risk_level: RiskLevel = None, limit: int = 100,
+                            since: datetime = None, until: datetime = None) -> List[Dict[str, Any]]:
+        """Get security events (newest first) with optional filtering by user, risk level and time range"""
+        return self.event_store.get_events(
+            user_id=user_id,
+            risk_level=risk_level.value if risk_level else None,
+            limit=limit,
+            since=since,
+            until=until
+        )
+    
+    def get_security_statistics(self) -> Dict[str, Any]:
+        """Get security statistics from the incrementally maintained counters"""
+        stats = self.event_store.get_statistics()
+        stats["verdict_cache"] = self.verdict_cache.get_stats()
+        stats["notifications"] = self.admin_notifier.get_statistics()
+        return stats
+    
     def is_command_safe(self, command: str, user_id: str, context: Dict[str, Any] = None) -> bool:
         """Quick safety check for a command"""
         assessment = self.assess_risk(command, user_id, context)
@@ -0,0 +1,197 @@
+"""
+Security Event Store for Jarvis AI Assistant
+Persists security events in a SQLite database shared by every worker process,
+indexed by time, with counters maintained in the same transaction as each
+insert so statistics never rescan history.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+class SecurityEventStore:
+    """Time-indexed security event log with shared incremental counters"""
+    
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('SECURITY_EVENT_DB', os.path.join('state', 'security_events.db'))
+        self.retention_days = int(os.getenv('SECURITY_EVENT_RETENTION_DAYS', '90'))
+        self.prune_interval = int(os.getenv('SECURITY_EVENT_PRUNE_INTERVAL', '3600'))  # seconds
+        self.local = threading.local()
+        
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS security_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                user_id TEXT,
+                risk_level TEXT,
+                data TEXT NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_security_events_ts ON security_events (ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_security_events_user ON security_events (user_id, id)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS security_event_counters (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+        ''')
+        
+        self._start_prune_thread()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One autocommit connection per thread, reused across requests"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _epoch(value: datetime) -> float:
+        """Seconds since the epoch (UTC); naive datetimes are local time, as events are stamped"""
+        return value.timestamp()
+    
+    def append(self, event: Dict[str, Any]):
+        """Persist an event and update the shared counters"""
+        try:
+            self._insert_events(self._connection(), [event])
+        except Exception as e:
+            print(f"Error writing security event: {e}")
+    
+    def _insert_events(self, conn: sqlite3.Connection, events: List[Dict[str, Any]]):
+        """Insert events and count them in one transaction"""
+        counts: Dict[tuple, int] = {}
+        rows = []
+        for event in events:
+            rows.append((
+                self._epoch(datetime.fromisoformat(event['timestamp'])),
+                event.get('user_id'),
+                event.get('risk_level'),
+                json.dumps(event)
+            ))
+            # No per-user rows: they would grow with every distinct user, so top users
+            # are counted from the retained events instead
+            keys = [('total', ''), ('level', event.get('risk_level') or '')]
+            if event.get('blocked'):
+                keys.append(('blocked', ''))
+            keys += [('category', category) for category in event.get('risk_categories', [])]
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO security_events (ts, user_id, risk_level, data) VALUES (?, ?, ?, ?)', rows
+            )
+            conn.executemany('''
+                INSERT INTO security_event_counters (kind, key, count) VALUES (?, ?, ?)
+                ON CONFLICT(kind, key) DO UPDATE SET count = count + excluded.count
+            ''', [(kind, key, count) for (kind, key), count in counts.items()])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def iter_events(self, since: datetime = None, until: datetime = None) -> Iterator[Dict[str, Any]]:
+        """Read persisted events in time order through the time index"""
+        query = 'SELECT data FROM security_events WHERE ts >= ? AND ts <= ? ORDER BY ts, id'
+        bounds = (
+            self._epoch(since) if since else float('-inf'),
+            self._epoch(until) if until else float('inf')
+        )
+        for (data,) in self._connection().execute(query, bounds).fetchall():
+            yield json.loads(data)
+    
+    def get_events(self, user_id: str = None, risk_level: str = None, limit: int = 100,
+                   since: datetime = None, until: datetime = None) -> List[Dict[str, Any]]:
+        """Get events newest first, optionally filtered by user, risk level and time range"""
+        clauses, params = [], []
+        if user_id:
+            clauses.append('user_id = ?')
+            params.append(user_id)
+        if risk_level:
+            clauses.append('risk_level = ?')
+            params.append(risk_level)
+        if since:
+            clauses.append('ts >= ?')
+            params.append(self._epoch(since))
+        if until:
+            clauses.append('ts <= ?')
+            params.append(self._epoch(until))
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connection().execute(
+            f'SELECT data FROM security_events {where} ORDER BY ts DESC, id DESC LIMIT ?', (*params, limit)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get counters over every event recorded by any worker
+        
+        Totals include events since removed by retention; the 24-hour count
+        is read from the time index and top users from the retained events.
+        """
+        conn = self._connection()
+        counters: Dict[str, Dict[str, int]] = {}
+        for kind, key, count in conn.execute('SELECT kind, key, count FROM security_event_counters'):
+            counters.setdefault(kind, {})[key] = count
+        
+        total = counters.get('total', {}).get('', 0)
+        blocked = counters.get('blocked', {}).get('', 0)
+        recent = conn.execute(
+            'SELECT COUNT(*) FROM security_events WHERE ts >= ?', (time.time() - 24 * 3600,)
+        ).fetchone()[0]
+        stored = conn.execute('SELECT COUNT(*) FROM security_events').fetchone()[0]
+        top_users = conn.execute('''
+            SELECT user_id, COUNT(*) AS events FROM security_events
+            WHERE user_id IS NOT NULL GROUP BY user_id ORDER BY events DESC LIMIT 10
+        ''').fetchall()
+        
+        def most_common(kind: str, n: int):
+            return sorted(counters.get(kind, {}).items(), key=lambda item: item[1], reverse=True)[:n]
+        
+        return {
+            "total_events": total,
+            "risk_distribution": counters.get('level', {}),
+            "blocked_commands": blocked,
+            "block_rate": (blocked / total) * 100 if total else 0.0,
+            "top_risk_categories": most_common('category', 5),
+            "top_users": [tuple(row) for row in top_users],
+            "recent_events_24h": recent,
+            "events_stored": stored,
+            "retention_days": self.retention_days
+        }
+    
+    def prune(self) -> int:
+        """Delete events older than the retention period; returns how many were removed"""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = time.time() - self.retention_days * 24 * 3600
+        cursor = self._connection().execute('DELETE FROM security_events WHERE ts < ?', (cutoff,))
+        return cursor.rowcount
+    
+    def _start_prune_thread(self):
+        """Start background thread that enforces event retention"""
+        def prune_loop():
+            while True:
+                time.sleep(self.prune_interval)
+                try:
+                    removed = self.prune()
+                    if removed:
+                        print(f"Removed {removed} security events past retention")
+                except Exception as e:
+                    print(f"Security event retention error: {e}")
+        
+        thread = threading.Thread(target=prune_loop, daemon=True)
+        thread.start()
@@ -5,24 +5,234 @@ Routes user queries to the most appropriate tool based on confidence scoring
 
 import os
 import sys
+import threading
+import time
 import importlib.util
-from typing import Dict, List, Tuple, Optional
+import ast
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Tuple, Optional, Pattern, Set
 import re
 
+from ..utils.ttl_cache import TTLCache
+
+# Tokens used for keyword routing (keywords and queries are tokenized the same way)
+TOKEN_PATTERN = re.compile(r'\w+')
+DEFAULT_KEYWORD_WEIGHT = 0.3
+
+# Deadline for a tool's custom confidence function (manifest "confidence_timeout" overrides)
+DEFAULT_CONFIDENCE_TIMEOUT = float(os.getenv('TOOL_CONFIDENCE_TIMEOUT', '0.25'))  # seconds
+
+# Bundled tools catch their own exceptions and return messages starting with these
+ERROR_RESULT_PREFIXES = ('Error ', 'Failed to ')
+
+# Deadline for one tool call (manifest "timeout" overrides); a call past it counts as a failure
+DEFAULT_TOOL_TIMEOUT = float(os.getenv('TOOL_EXECUTION_TIMEOUT', '30'))  # seconds
+
+# Concurrent calls allowed per async tool (manifest "max_concurrency" overrides)
+DEFAULT_TOOL_CONCURRENCY = int(os.getenv('TOOL_MAX_CONCURRENCY', '8'))
+
 # Add the tools directory to the path
 tools_dir = os.path.join(os.path.dirname(__file__), '..', 'tools')
 if tools_dir not in sys.path:
     sys.path.append(tools_dir)
 
+class ToolResultCache:
+    """Tool result cache (LRU with per-entry expiry) with per-tool hit rates"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.cache = TTLCache(max_entries=max_entries)
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+    
+    def _record(self, tool_name: str, outcome: str):
+        with self.lock:
+            tool_stats = self.stats.setdefault(tool_name, {'hits': 0, 'misses': 0})
+            tool_stats[outcome] += 1
+    
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Return a cached result, or None if missing or expired"""
+        result = self.cache.get(key)
+        self._record(key[0], 'misses' if result is None else 'hits')
+        return result
+    
+    def set(self, key: Tuple, result: Dict, ttl: float):
+        """Store a result for ttl seconds, evicting the least recently used entry when full"""
+        self.cache.set(key, result, ttl=ttl)
+    
+    def clear(self, tool_name: Optional[str] = None):
+        """Drop cached results for one tool, or for all tools"""
+        if tool_name is None:
+            self.cache.clear()
+        else:
+            self.cache.delete_where(lambda key: key[0] == tool_name)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and per-tool hit rates"""
+        cache_stats = self.cache.get_stats()
+        with self.lock:
+            by_tool = {}
+            for tool_name, tool_stats in self.stats.items():
+                lookups = tool_stats['hits'] + tool_stats['misses']
+                by_tool[tool_name] = {
+                    **tool_stats,
+                    'hit_rate': tool_stats['hits'] / lookups if lookups else 0.0
+                }
+        
+        return {
+            'entries': cache_stats['entries'],
+            'max_entries': cache_stats['max_entries'],
+            'evictions': cache_stats['evictions'],
+            'expirations': cache_stats['expirations'],
+            'by_tool': by_tool
+        }
+
+class CircuitBreaker:
+    """
+    Per-tool circuit breaker over a window of recent calls
+    
+    Opens when the error rate or slow-call rate of the window reaches the
+    threshold, fails fast while open, and after a cooldown lets a single
+    half-open probe through to decide whether to close again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, window_size: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_ms: int = 5000, cooldown: float = 30.0):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.calls: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)  # (failed, slow)
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.rejected = 0
+        self.lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Whether a call may go through now"""
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            
+            self.rejected += 1
+            return False
+    
+    def record(self, success: bool, duration_ms: int):
+        """Record the outcome of a call that was allowed through"""
+        failed = not success
+        slow = duration_ms >= self.slow_call_ms
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self.calls.clear()
+                return
+            
+            self.calls.append((failed, slow))
+            if self.state == self.CLOSED and len(self.calls) >= self.min_calls:
+                failures = sum(1 for call_failed, _ in self.calls if call_failed)
+                slow_calls = sum(1 for _, call_slow in self.calls if call_slow)
+                if max(failures, slow_calls) / len(self.calls) >= self.failure_rate:
+                    self._open()
+    
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.calls.clear()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get breaker state for monitoring"""
+        with self.lock:
+            status = {
+                'state': self.state,
+                'recent_calls': len(self.calls),
+                'recent_failures': sum(1 for call_failed, _ in self.calls if call_failed),
+                'recent_slow_calls': sum(1 for _, call_slow in self.calls if call_slow),
+                'rejected': self.rejected
+            }
+            if self.state == self.OPEN:
+                status['retry_in_seconds'] = max(self.cooldown - (time.monotonic() - self.opened_at), 0)
+            return status
+
 class ToolRouter:
     def __init__(self):
         self.tools = {}
         self.confidence_functions = {}
+        # Inverted index: first keyword token -> [(tool_name, " phrase " or None, weight)]
+        self.keyword_index: Dict[str, List[Tuple[str, Optional[str], float]]] = {}
+        # Pattern source -> (compiled pattern, [(tool_name, weight)])
+        self.pattern_index: Dict[str, Tuple[Pattern, List[Tuple[str, float]]]] = {}
+        
+        # Custom confidence functions run concurrently on a bounded pool
+        self.scoring_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TOOL_SCORING_WORKERS', '8')),
+            thread_name_prefix='tool-scoring'
+        )
+        self.metrics_lock = threading.Lock()
+        self.confidence_timeouts: Dict[str, int] = {}
+        # Calls that missed their deadline and still hold a pool thread; a tool with one
+        # is not scored again until it finishes or is reloaded, so a hung tool can occupy
+        # at most one worker
+        self.overdue_scoring: Dict[str, Future] = {}
+        
+        # Results of tools whose manifest sets "cacheable" (for "cache_ttl" seconds)
+        self.result_cache = ToolResultCache(int(os.getenv('TOOL_CACHE_MAX_ENTRIES', '1024')))
+        
+        # Guards lazy imports of tool modules
+        self.load_lock = threading.Lock()
+        
+        # Async tools ("run_async") share one background event loop, started on first use;
+        # submit_tool also awaits sync tools' deadlines there, so no thread just waits
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_lock = threading.Lock()
+        self.tool_semaphores: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+        # Sync run functions execute here so callers can stop waiting at the deadline;
+        # calls still running past it are tracked until they return, and a tool with
+        # max_overdue_calls of them is refused new calls so it cannot drain the pool
+        self.call_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TOOL_CALL_WORKERS', '16')),
+            thread_name_prefix='tool-call'
+        )
+        self.max_overdue_calls = int(os.getenv('TOOL_MAX_OVERDUE_CALLS', '2'))
+        self.overdue_calls: Dict[str, Set[Future]] = {}
+        
+        # Circuit breakers for failing or slow tools, created on first execution
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.breaker_settings = {
+            'window_size': int(os.getenv('TOOL_BREAKER_WINDOW', '20')),
+            'min_calls': int(os.getenv('TOOL_BREAKER_MIN_CALLS', '5')),
+            'failure_rate': float(os.getenv('TOOL_BREAKER_FAILURE_RATE', '0.5')),
+            'slow_call_ms': int(os.getenv('TOOL_BREAKER_SLOW_CALL_MS', '5000')),
+            'cooldown': float(os.getenv('TOOL_BREAKER_COOLDOWN', '30'))
+        }
+        
+        self.tools_directory = os.path.join(os.path.dirname(__file__), '..', 'tools')
         self.load_tools()
+        
+        # Poll tool files by mtime and hot-swap changed modules (0 disables)
+        self.reload_interval = float(os.getenv('TOOL_RELOAD_INTERVAL', '5'))
+        if self.reload_interval > 0:
+            self._start_reload_thread()
     
     def load_tools(self):
-        """Load all available tools and their confidence functions"""
-        tools_directory = os.path.join(os.path.dirname(__file__), '..', 'tools')
+        """Register all available tools from their manifests"""
+        tools_directory = self.tools_directory
         
         if not os.path.exists(tools_directory):
             print(f"Tools directory not found: {tools_directory}")
@@ -33,59 +243,346 @@ class ToolRouter:
             if filename.endswith('.py') and not filename.startswith('__'):
                 tool_name = filename[:-3]  # Remove .py extension
                 self.load_tool(tool_name, tools_directory)
+        
+        self.build_routing_index()
+    
+    def read_tool_manifest(self, tool_path: str) -> Tuple[Optional[Dict], List[str]]:
+        """
+        Read a tool's manifest and top-level function names without importing it
+        
+        Returns:
+            Tuple of (manifest, function_names); manifest is None if it is not a literal
+        """
+        with open(tool_path, 'r') as f:
+            tree = ast.parse(f.read(), filename=tool_path)
+        
+        manifest = None
+        function_names = []
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                function_names.append(node.name)
+            elif isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == 'manifest' for target in node.targets
+            ):
+                try:
+                    manifest = ast.literal_eval(node.value)
+                except ValueError:
+                    manifest = None
+        
+        return manifest, function_names
+    
+    def _read_tool_info(self, tool_name: str, tool_path: str) -> Dict:
+        """Build a tool's registry entry from its manifest, without importing it"""
+        manifest, function_names = self.read_tool_manifest(tool_path)
+        
+        # Tools that declare keywords or patterns are scored through the index;
+        # a confidence function is only used for tools with custom logic
+        confidence_function_name = None
+        if not manifest or not (manifest.get('keywords') or manifest.get('patterns')):
+            confidence_function_name = next(
+                (name for name in self._confidence_function_names(tool_name) if name in function_names), None
+            )
+        
+        return {
+            'module': None,
+            'path': tool_path,
+            'mtime': os.path.getmtime(tool_path),
+            'run': None,
+            'run_async': None,
+            'manifest': manifest or {},
+            'enabled': (manifest or {}).get('enabled', True),
+            'confidence_function_name': confidence_function_name
+        }
     
     def load_tool(self, tool_name: str, tools_directory: str):
-        """Load a specific tool and its confidence function"""
+        """Register a tool from its manifest; the module is imported on first use"""
         try:
             tool_path = os.path.join(tools_directory, f"{tool_name}.py")
+            tool_info = self._read_tool_info(tool_name, tool_path)
             
-            # Load the module
-            spec = importlib.util.spec_from_file_location(tool_name, tool_path)
-            if spec is None or spec.loader is None:
-                print(f"Failed to load tool: {tool_name}")
-                return
+            # Store the tool (copy-on-write so concurrent readers never see a resized dict)
+            self.tools = {**self.tools, tool_name: tool_info}
+            self.confidence_functions.pop(tool_name, None)
             
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            if not tool_info['manifest']:
+                # The manifest is computed at import time, so the module must be loaded now
+                self.ensure_tool_loaded(tool_name)
             
-            # Store the tool
-            self.tools[tool_name] = {
-                'module': module,
-                'run': getattr(module, 'run', None),
-                'manifest': getattr(module, 'manifest', {}),
-                'enabled': getattr(module, 'manifest', {}).get('enabled', True)
-            }
+            print(f"Registered tool: {tool_name}")
+        
+        except Exception as e:
+            print(f"Error loading tool {tool_name}: {str(e)}")
+    
+    def _confidence_function_names(self, tool_name: str) -> Tuple[str, str]:
+        """Names a tool module may use for a custom confidence function"""
+        return (f"get_{tool_name.replace('_', '')}_confidence", 'get_confidence')
+    
+    def _import_tool(self, tool_name: str, tool_info: Dict):
+        """Execute a tool's module and fill in its entry; raises if the module fails to load"""
+        spec = importlib.util.spec_from_file_location(tool_name, tool_info['path'])
+        if spec is None or spec.loader is None:
+            raise ImportError(f"No module spec for {tool_info['path']}")
+        
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        
+        if not tool_info['manifest']:
+            # Manifest was not a literal; take it from the imported module
+            manifest = getattr(module, 'manifest', {})
+            tool_info['manifest'] = manifest
+            tool_info['enabled'] = manifest.get('enabled', True)
+            tool_info['confidence_function_name'] = None
+            if not (manifest.get('keywords') or manifest.get('patterns')):
+                tool_info['confidence_function_name'] = next(
+                    (name for name in self._confidence_function_names(tool_name) if hasattr(module, name)), None
+                )
+        
+        confidence_function_name = tool_info['confidence_function_name']
+        if confidence_function_name:
+            self.confidence_functions[tool_name] = getattr(module, confidence_function_name)
+        
+        tool_info['run'] = getattr(module, 'run', None)
+        run_async = getattr(module, 'run_async', None)
+        tool_info['run_async'] = run_async if asyncio.iscoroutinefunction(run_async) else None
+        # Publish the module last so lock-free readers see a fully loaded tool
+        tool_info['module'] = module
+    
+    def ensure_tool_loaded(self, tool_name: str) -> bool:
+        """Import a tool's module if it has not been imported yet"""
+        tool_info = self.tools[tool_name]
+        if tool_info['module'] is not None:
+            return True
+        
+        with self.load_lock:
+            if tool_info['module'] is not None:
+                return True
             
-            # Look for confidence function
-            confidence_func_name = f"get_{tool_name.replace('_', '')}_confidence"
-            if hasattr(module, confidence_func_name):
-                self.confidence_functions[tool_name] = getattr(module, confidence_func_name)
-            elif hasattr(module, 'get_confidence'):
-                self.confidence_functions[tool_name] = getattr(module, 'get_confidence')
-            else:
-                # Create a default confidence function
-                self.confidence_functions[tool_name] = self.create_default_confidence_function(tool_name)
+            manifest_known = bool(tool_info['manifest'])
+            try:
+                self._import_tool(tool_name, tool_info)
+            except Exception as e:
+                print(f"Error loading tool {tool_name}: {str(e)}")
+                return False
             
             print(f"Loaded tool: {tool_name}")
+        
+        if not manifest_known:
+            # The import supplied the manifest, so its keywords and patterns can be indexed now
+            self.build_routing_index()
+        return True
+    
+    def reload_changed_tools(self) -> List[str]:
+        """
+        Pick up added, modified and removed tool files
+        
+        A modified tool that was already imported is re-imported into a fresh
+        module and swapped in only once it loads cleanly; until then the old
+        version keeps serving routing and execution.
+        
+        Returns:
+            List of tool names whose registration changed
+        """
+        tools_directory = self.tools_directory
+        if not os.path.exists(tools_directory):
+            return []
+        
+        changed = []
+        seen = set()
+        for filename in os.listdir(tools_directory):
+            if not filename.endswith('.py') or filename.startswith('__'):
+                continue
             
-        except Exception as e:
-            print(f"Error loading tool {tool_name}: {str(e)}")
+            tool_name = filename[:-3]
+            seen.add(tool_name)
+            tool_path = os.path.join(tools_directory, filename)
+            old_info = self.tools.get(tool_name)
+            try:
+                if old_info is not None and os.path.getmtime(tool_path) == old_info.get('mtime'):
+                    continue
+                
+                new_info = self._read_tool_info(tool_name, tool_path)
+                
+                # A manifest that is not a literal only exists once the module runs (as in load_tool)
+                if (old_info is not None and old_info['module'] is not None) or not new_info['manifest']:
+                    with self.load_lock:
+                        self._import_tool(tool_name, new_info)
+                
+                if old_info is not None:
+                    # Keep admin enable/disable decisions across reloads
+                    new_info['enabled'] = old_info.get('enabled', True)
+            except Exception as e:
+                print(f"Error reloading tool {tool_name}, keeping previous version: {str(e)}")
+                if old_info is not None:
+                    # Do not retry the same broken file on every poll
+                    old_info['mtime'] = os.path.getmtime(tool_path)
+                continue
+            
+            if new_info['module'] is None:
+                self.confidence_functions.pop(tool_name, None)
+            self.tools = {**self.tools, tool_name: new_info}
+            self.result_cache.clear(tool_name)
+            self.breakers.pop(tool_name, None)
+            # A call stuck in the old version says nothing about the new one
+            self.overdue_scoring.pop(tool_name, None)
+            self.overdue_calls.pop(tool_name, None)
+            changed.append(tool_name)
+            print(f"Reloaded tool: {tool_name}")
+        
+        for tool_name in [tool_name for tool_name in self.tools if tool_name not in seen]:
+            self.tools = {name: info for name, info in self.tools.items() if name != tool_name}
+            self.confidence_functions.pop(tool_name, None)
+            self.result_cache.clear(tool_name)
+            self.overdue_scoring.pop(tool_name, None)
+            self.overdue_calls.pop(tool_name, None)
+            changed.append(tool_name)
+            print(f"Removed tool: {tool_name}")
+        
+        if changed:
+            self.build_routing_index()
+        
+        return changed
     
-    def create_default_confidence_function(self, tool_name: str):
-        """Create a default confidence function based on tool name"""
-        def default_confidence(input_text: str) -> float:
-            # Simple keyword matching based on tool name
-            keywords = tool_name.replace('_', ' ').split()
-            input_lower = input_text.lower()
+    def _start_reload_thread(self):
+        """Start background thread that watches tool files for changes"""
+        def reload_loop():
+            while True:
+                time.sleep(self.reload_interval)
+                try:
+                    self.reload_changed_tools()
+                except Exception as e:
+                    print(f"Tool reload error: {e}")
+        
+        thread = threading.Thread(target=reload_loop, daemon=True)
+        thread.start()
+    
+    def build_routing_index(self):
+        """Build the keyword and pattern indexes from the loaded tools' manifests"""
+        keyword_index: Dict[str, List[Tuple[str, Optional[str], float]]] = {}
+        pattern_index: Dict[str, Tuple[Pattern, List[Tuple[str, float]]]] = {}
+        
+        for tool_name, tool_info in self.tools.items():
+            if tool_info.get('confidence_function_name'):
+                continue
+            
+            manifest = tool_info.get('manifest', {})
+            keywords = manifest.get('keywords')
+            patterns = manifest.get('patterns', {})
+            if not keywords and not patterns:
+                # Default to the words of the tool name
+                keywords = tool_name.split('_')
+            
+            weight = manifest.get('keyword_weight', DEFAULT_KEYWORD_WEIGHT)
+            for keyword in keywords or []:
+                tokens = TOKEN_PATTERN.findall(keyword.lower())
+                if not tokens:
+                    continue
+                phrase = f" {' '.join(tokens)} " if len(tokens) > 1 else None
+                keyword_index.setdefault(tokens[0], []).append((tool_name, phrase, weight))
+            
+            for pattern, pattern_weight in patterns.items():
+                try:
+                    entry = pattern_index.get(pattern) or (re.compile(pattern), [])
+                except re.error as e:
+                    print(f"Invalid routing pattern for {tool_name}: {pattern} ({e})")
+                    continue
+                entry[1].append((tool_name, pattern_weight))
+                pattern_index[pattern] = entry
+        
+        self.keyword_index = keyword_index
+        self.pattern_index = pattern_index
+    
+    def _score_indexed_tools(self, input_text: str) -> Dict[str, float]:
+        """Score the tools whose declared keywords or patterns occur in the input"""
+        tokens = TOKEN_PATTERN.findall(input_text.lower())
+        token_text = f" {' '.join(tokens)} "
+        scores: Dict[str, float] = {}
+        
+        for token in dict.fromkeys(tokens):  # unique, in query order
+            for tool_name, phrase, weight in self.keyword_index.get(token, ()):
+                if phrase is None or phrase in token_text:
+                    scores[tool_name] = scores.get(tool_name, 0.0) + weight
+        
+        for compiled, targets in self.pattern_index.values():
+            if compiled.search(input_text):
+                for tool_name, weight in targets:
+                    scores[tool_name] = scores.get(tool_name, 0.0) + weight
+        
+        return {
+            tool_name: min(score, 1.0)
+            for tool_name, score in scores.items()
+            if self.tools.get(tool_name, {}).get('enabled', False)
+        }
+    
+    def _score_custom_tools(self, input_text: str) -> Dict[str, float]:
+        """Run custom confidence functions concurrently, scoring tools that miss their deadline as zero"""
+        started = time.monotonic()
+        futures = {}
+        scores = {}
+        for tool_name, tool_info in self.tools.items():
+            if not tool_info.get('confidence_function_name') or not tool_info.get('enabled', True):
+                continue
+            # Tools with custom logic are imported the first time they are scored
+            if not self.ensure_tool_loaded(tool_name) or tool_name not in self.confidence_functions:
+                continue
             
-            confidence = 0.0
-            for keyword in keywords:
-                if keyword in input_lower:
-                    confidence += 0.3
+            overdue = self.overdue_scoring.get(tool_name)
+            if overdue is not None:
+                self._record_confidence_timeout(tool_name)
+                scores[tool_name] = 0.0
+                continue
             
-            return min(confidence, 1.0)
+            confidence_function = self.confidence_functions[tool_name]
+            timeout = tool_info['manifest'].get('confidence_timeout', DEFAULT_CONFIDENCE_TIMEOUT)
+            futures[tool_name] = (self.scoring_pool.submit(confidence_function, input_text), timeout)
+        
+        for tool_name, (future, timeout) in futures.items():
+            try:
+                scores[tool_name] = future.result(timeout=max(started + timeout - time.monotonic(), 0))
+            except FutureTimeoutError:
+                if not future.cancel():
+                    # Already running: it cannot be stopped, so hold the tool back until it returns
+                    self.overdue_scoring[tool_name] = future
+                    future.add_done_callback(
+                        lambda done, name=tool_name: self._clear_overdue_scoring(name, done)
+                    )
+                print(f"Confidence for {tool_name} timed out after {timeout}s")
+                self._record_confidence_timeout(tool_name)
+                scores[tool_name] = 0.0
+            except Exception as e:
+                print(f"Error calculating confidence for {tool_name}: {str(e)}")
+                scores[tool_name] = 0.0
         
-        return default_confidence
+        return scores
+    
+    def _clear_overdue_scoring(self, tool_name: str, future: Future):
+        """Let a tool be scored again once its overdue confidence call returns"""
+        with self.metrics_lock:
+            if self.overdue_scoring.get(tool_name) is future:
+                del self.overdue_scoring[tool_name]
+    
+    def _record_confidence_timeout(self, tool_name: str):
+        with self.metrics_lock:
+            self.confidence_timeouts[tool_name] = self.confidence_timeouts.get(tool_name, 0) + 1
+    
+    def get_routing_metrics(self) -> Dict:
+        """Get routing metrics"""
+        with self.metrics_lock:
+            confidence_timeouts = dict(self.confidence_timeouts)
+        
+        return {
+            'indexed_keywords': len(self.keyword_index),
+            'indexed_patterns': len(self.pattern_index),
+            'custom_confidence_tools': [
+                tool_name for tool_name, tool_info in self.tools.items() if tool_info.get('confidence_function_name')
+            ],
+            'loaded_tools': [tool_name for tool_name, tool_info in self.tools.items() if tool_info['module'] is not None],
+            'confidence_timeouts': confidence_timeouts,
+            'overdue_confidence_tools': [
+                tool_name for tool_name, future in list(self.overdue_scoring.items()) if not future.done()
+            ],
+            'overdue_tool_calls': {tool_name: len(calls) for tool_name, calls in list(self.overdue_calls.items())},
+            'result_cache': self.result_cache.get_stats()
+        }
     
     def route_query(self, input_text: str, threshold: float = 0.3) -> Tuple[Optional[str], float, Dict]:
         """
@@ -94,34 +591,24 @@ class ToolRouter:
         Args:
             input_text (str): User input to route
             threshold (float): Minimum confidence threshold
-            
+        
         Returns:
             Tuple of (tool_name, confidence, routing_info)
         """
         if not input_text.strip():
             return None, 0.0, {'error': 'Empty input'}
         
-        # Calculate confidence for each tool
-        tool_scores = {}
+        if not any(tool_info.get('enabled', True) for tool_info in self.tools.values()):
+            return None, 0.0, {'error': 'No tools available'}
         
-        for tool_name, tool_info in self.tools.items():
-            if not tool_info.get('enabled', True):
-                continue
-            
-            if tool_name in self.confidence_functions:
-                try:
-                    confidence = self.confidence_functions[tool_name](input_text)
-                    tool_scores[tool_name] = confidence
-                except Exception as e:
-                    print(f"Error calculating confidence for {tool_name}: {str(e)}")
-                    tool_scores[tool_name] = 0.0
+        # Only tools matching an indexed keyword or pattern are candidates
+        tool_scores = self._score_indexed_tools(input_text)
         
-        # Find the best tool
-        if not tool_scores:
-            return None, 0.0, {'error': 'No tools available'}
+        # Tools with custom confidence logic are always scored
+        tool_scores.update(self._score_custom_tools(input_text))
         
-        best_tool = max(tool_scores.items(), key=lambda x: x[1])
-        best_tool_name, best_confidence = best_tool
+        # Find the best tool
+        best_tool_name, best_confidence = max(tool_scores.items(), key=lambda x: x[1], default=(None, 0.0))
         
         # Check if confidence meets threshold
         if best_confidence < threshold:
@@ -146,16 +633,70 @@ class ToolRouter:
             tool_name (str): Name of the tool to execute
             input_text (str): Input for the tool
             **kwargs: Additional arguments
-            
+        
         Returns:
             Dict with execution result
         """
+        early_result, tool_info, cache_key = self._prepare_execution(tool_name, input_text, kwargs)
+        if early_result is not None:
+            return early_result
+        
+        if tool_info.get('run_async'):
+            # Async tools run on the shared event loop; this thread only waits for the result
+            return self._submit_async_tool(tool_name, tool_info, cache_key, input_text, kwargs).result()
+        
+        return self._run_sync_tool(tool_name, tool_info, cache_key, input_text, kwargs)
+    
+    def submit_tool(self, tool_name: str, input_text: str, **kwargs) -> Future:
+        """
+        Start executing a tool without waiting for it
+        
+        Async tools are awaited on the shared event loop, so many calls can be
+        in flight without holding a thread each; sync tools take one call pool
+        thread, and their deadline is awaited on the loop.
+        
+        Returns:
+            Future resolving to the same dict as execute_tool
+        """
+        early_result, tool_info, cache_key = self._prepare_execution(tool_name, input_text, kwargs)
+        if early_result is not None:
+            future = Future()
+            future.set_result(early_result)
+            return future
+        
+        if tool_info.get('run_async'):
+            return self._submit_async_tool(tool_name, tool_info, cache_key, input_text, kwargs)
+        
+        return self._submit_sync_tool(tool_name, tool_info, cache_key, input_text, kwargs)
+    
+    def execute_tools(self, calls: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Execute several tools concurrently
+        
+        Args:
+            calls: List of (tool_name, input_text) pairs
+        
+        Returns:
+            List of execution results in the order of calls
+        """
+        futures = [self.submit_tool(tool_name, input_text) for tool_name, input_text in calls]
+        return [future.result() for future in futures]
+    
+    def _prepare_execution(self, tool_name: str, input_text: Any,
+                           kwargs: Dict) -> Tuple[Optional[Dict], Optional[Dict], Optional[Tuple]]:
+        """
+        Validate a tool call and look it up in the result cache
+        
+        Returns:
+            Tuple of (early_result, tool_info, cache_key); early_result is set when
+            the call fails validation or is served from the cache
+        """
         if tool_name not in self.tools:
             return {
                 'success': False,
                 'error': f"Tool '{tool_name}' not found",
                 'output': None
-            }
+            }, None, None
         
         tool_info = self.tools[tool_name]
         
@@ -164,39 +705,252 @@ class ToolRouter:
                 'success': False,
                 'error': f"Tool '{tool_name}' is disabled",
                 'output': None
-            }
+            }, None, None
+        
+        if not self.ensure_tool_loaded(tool_name):
+            return {
+                'success': False,
+                'error': f"Tool '{tool_name}' failed to load",
+                'output': None
+            }, None, None
         
-        run_function = tool_info.get('run')
-        if not run_function:
+        if not tool_info.get('run') and not tool_info.get('run_async'):
             return {
                 'success': False,
                 'error': f"Tool '{tool_name}' has no run function",
                 'output': None
-            }
+            }, None, None
+        
+        cache_key = self._cache_key(tool_name, input_text, kwargs)
+        if cache_key is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return {**cached, 'cached': True}, None, None
+        
+        breaker = self.get_breaker(tool_name)
+        if not breaker.allow_request():
+            return {
+                'success': False,
+                'error': f"Tool '{tool_name}' is temporarily unavailable after repeated failures or timeouts",
+                'output': None,
+                'tool_name': tool_name,
+                'circuit_state': breaker.state
+            }, None, None
+        
+        return None, tool_info, cache_key
+    
+    def _run_sync_tool(self, tool_name: str, tool_info: Dict, cache_key: Optional[Tuple],
+                       input_text: str, kwargs: Dict) -> Dict:
+        """Run a sync tool's run function and wait for it until the tool's deadline"""
+        start_time = datetime.now()
+        timeout = tool_info['manifest'].get('timeout', DEFAULT_TOOL_TIMEOUT)
+        
+        future = self._start_sync_call(tool_name, tool_info, input_text, kwargs)
+        if future is None:
+            return self._execution_timeout(tool_name, timeout, start_time, still_running=True)
         
         try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._mark_call_overdue(tool_name, future)
+            return self._execution_timeout(tool_name, timeout, start_time)
+        except Exception as e:
+            return self._execution_error(tool_name, e, start_time)
+        
+        return self._finish_execution(tool_name, tool_info, cache_key, result, start_time)
+    
+    def _submit_sync_tool(self, tool_name: str, tool_info: Dict, cache_key: Optional[Tuple],
+                          input_text: str, kwargs: Dict) -> Future:
+        """Run a sync tool on the call pool and await its deadline on the event loop"""
+        async def execute() -> Dict:
             start_time = datetime.now()
-            result = run_function(input_text, **kwargs)
-            end_time = datetime.now()
+            timeout = tool_info['manifest'].get('timeout', DEFAULT_TOOL_TIMEOUT)
             
-            duration_ms = int((end_time - start_time).total_seconds() * 1000)
+            future = self._start_sync_call(tool_name, tool_info, input_text, kwargs)
+            if future is None:
+                return self._execution_timeout(tool_name, timeout, start_time, still_running=True)
             
-            return {
-                'success': True,
-                'error': None,
-                'output': str(result) if result is not None else None,
-                'tool_name': tool_name,
-                'duration_ms': duration_ms,
-                'executed_at': end_time.isoformat()
-            }
+            try:
+                # Shielded so the deadline only stops the wait; the call is handled below
+                result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            except asyncio.TimeoutError:
+                self._mark_call_overdue(tool_name, future)
+                return self._execution_timeout(tool_name, timeout, start_time)
+            except Exception as e:
+                return self._execution_error(tool_name, e, start_time)
             
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"Error executing tool '{tool_name}': {str(e)}",
-                'output': None,
-                'tool_name': tool_name
-            }
+            return self._finish_execution(tool_name, tool_info, cache_key, result, start_time)
+        
+        return asyncio.run_coroutine_threadsafe(execute(), self._get_event_loop())
+    
+    def _start_sync_call(self, tool_name: str, tool_info: Dict, input_text: str, kwargs: Dict) -> Optional[Future]:
+        """Submit a sync run function to the call pool; None while the tool has too many overdue calls"""
+        if len(self.overdue_calls.get(tool_name, ())) >= self.max_overdue_calls:
+            return None
+        
+        return self.call_pool.submit(tool_info['run'], input_text, **kwargs)
+    
+    def _mark_call_overdue(self, tool_name: str, future: Future):
+        """Cancel a call that missed its deadline, or track it until it returns"""
+        if future.cancel():
+            return
+        with self.metrics_lock:
+            self.overdue_calls.setdefault(tool_name, set()).add(future)
+        future.add_done_callback(lambda done, name=tool_name: self._clear_overdue_call(name, done))
+    
+    def _clear_overdue_call(self, tool_name: str, future: Future):
+        """Stop counting an overdue call once it returns"""
+        with self.metrics_lock:
+            calls = self.overdue_calls.get(tool_name)
+            if calls is not None:
+                calls.discard(future)
+                if not calls:
+                    del self.overdue_calls[tool_name]
+    
+    def _finish_execution(self, tool_name: str, tool_info: Dict, cache_key: Optional[Tuple],
+                          result: Any, start_time: datetime) -> Dict:
+        """Build the execution result and cache it if the tool allows"""
+        end_time = datetime.now()
+        
+        # An error message returned by the tool is a failed call, not a result
+        failed = self._is_error_result(result)
+        duration_ms = int((end_time - start_time).total_seconds() * 1000)
+        self.get_breaker(tool_name).record(not failed, duration_ms)
+        
+        execution_result = {
+            'success': not failed,
+            'error': result if failed else None,
+            'output': str(result) if result is not None else None,
+            'tool_name': tool_name,
+            'duration_ms': duration_ms,
+            'executed_at': end_time.isoformat()
+        }
+        
+        if cache_key is not None and not failed:
+            self.result_cache.set(cache_key, execution_result, tool_info['manifest'].get('cache_ttl', 300))
+        
+        return execution_result
+    
+    def _execution_error(self, tool_name: str, error: Exception, start_time: datetime) -> Dict:
+        """Build the result for a tool that raised"""
+        duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        self.get_breaker(tool_name).record(False, duration_ms)
+        
+        return {
+            'success': False,
+            'error': f"Error executing tool '{tool_name}': {str(error)}",
+            'output': None,
+            'tool_name': tool_name
+        }
+    
+    def _execution_timeout(self, tool_name: str, timeout: float, start_time: datetime,
+                           still_running: bool = False) -> Dict:
+        """Build the result for a call that missed its deadline (or was refused while earlier ones hang)"""
+        if still_running:
+            # Refused without running: nothing new was learned about the tool, so the breaker is left alone
+            error = f"Tool '{tool_name}' is still running {self.max_overdue_calls} calls that exceeded its {timeout}s deadline"
+        else:
+            duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            self.get_breaker(tool_name).record(False, max(duration_ms, int(timeout * 1000)))
+            error = f"Tool '{tool_name}' timed out after {timeout}s"
+        return {
+            'success': False,
+            'error': error,
+            'output': None,
+            'tool_name': tool_name
+        }
+    
+    def get_breaker(self, tool_name: str) -> CircuitBreaker:
+        """Get the circuit breaker for a tool, creating it on first use"""
+        breaker = self.breakers.get(tool_name)
+        if breaker is None:
+            with self.metrics_lock:
+                breaker = self.breakers.setdefault(tool_name, CircuitBreaker(**self.breaker_settings))
+        return breaker
+    
+    def reset_breaker(self, tool_name: str) -> bool:
+        """Close a tool's circuit breaker by discarding its state, including overdue calls"""
+        if tool_name not in self.tools:
+            return False
+        with self.metrics_lock:
+            self.breakers.pop(tool_name, None)
+            # Calls still hung keep their threads but no longer hold the tool back
+            self.overdue_calls.pop(tool_name, None)
+        return True
+    
+    def get_breaker_status(self) -> Dict[str, Dict[str, Any]]:
+        """Get circuit breaker state for every tool that has executed"""
+        return {tool_name: breaker.get_status() for tool_name, breaker in list(self.breakers.items())}
+    
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the shared background event loop, starting it on first use"""
+        if self.event_loop is None:
+            with self.loop_lock:
+                if self.event_loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, daemon=True, name='tool-event-loop')
+                    thread.start()
+                    self.event_loop = loop
+        return self.event_loop
+    
+    def _submit_async_tool(self, tool_name: str, tool_info: Dict, cache_key: Optional[Tuple],
+                           input_text: str, kwargs: Dict) -> Future:
+        """Schedule an async tool on the event loop, limited by its manifest max_concurrency"""
+        limit = tool_info['manifest'].get('max_concurrency', DEFAULT_TOOL_CONCURRENCY)
+        
+        async def execute() -> Dict:
+            # Semaphores are only touched on the loop thread
+            semaphore = self.tool_semaphores.get((tool_name, limit))
+            if semaphore is None:
+                semaphore = self.tool_semaphores[(tool_name, limit)] = asyncio.Semaphore(limit)
+            
+            async with semaphore:
+                start_time = datetime.now()
+                timeout = tool_info['manifest'].get('timeout', DEFAULT_TOOL_TIMEOUT)
+                try:
+                    result = await asyncio.wait_for(tool_info['run_async'](input_text, **kwargs), timeout)
+                    return self._finish_execution(tool_name, tool_info, cache_key, result, start_time)
+                except asyncio.TimeoutError:
+                    return self._execution_timeout(tool_name, timeout, start_time)
+                except Exception as e:
+                    return self._execution_error(tool_name, e, start_time)
+        
+        return asyncio.run_coroutine_threadsafe(execute(), self._get_event_loop())
+    
+    def _cache_key(self, tool_name: str, input_text: Any, kwargs: Dict) -> Optional[Tuple]:
+        """Build the result cache key, or None if the call is not cacheable"""
+        if not self.tools[tool_name]['manifest'].get('cacheable', False):
+            return None
+        if not isinstance(input_text, str):
+            return None
+        
+        try:
+            extra = tuple(sorted(kwargs.items()))
+            hash(extra)
+        except TypeError:
+            return None
+        
+        normalization = self.tools[tool_name]['manifest'].get('cache_key_normalization', 'casefold')
+        return (tool_name, self._normalize_cache_input(input_text, normalization), extra)
+    
+    def _normalize_cache_input(self, input_text: str, normalization: str) -> str:
+        """
+        Normalize input for the cache key per the tool's manifest
+        
+        "casefold" (default) collapses whitespace and ignores case, "whitespace"
+        only collapses whitespace (e.g. for case-sensitive URLs), and "exact"
+        keeps the input as given for tools whose output depends on its layout.
+        """
+        if normalization == 'exact':
+            return input_text
+        collapsed = ' '.join(input_text.split())
+        if normalization == 'whitespace':
+            return collapsed
+        return collapsed.casefold()
+    
+    def _is_error_result(self, result: Any) -> bool:
+        """Whether a tool returned an error message instead of a result"""
+        return isinstance(result, str) and result.startswith(ERROR_RESULT_PREFIXES)
     
     def route_and_execute(self, input_text: str, threshold: float = 0.3, **kwargs) -> Dict:
         """
@@ -206,7 +960,7 @@ class ToolRouter:
             input_text (str): User input
             threshold (float): Confidence threshold
             **kwargs: Additional arguments for tool execution
-            
+        
         Returns:
             Dict with routing and execution results
         """
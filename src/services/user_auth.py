@@ -5,11 +5,15 @@ Handles JWT tokens, password hashing, and user authentication
 
 import os
 import jwt
+import time
 import bcrypt
 import uuid
+import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
+from ..utils.ttl_cache import TTLCache
+
 class AuthService:
     """Authentication service with JWT support"""
     
@@ -19,8 +23,18 @@ class AuthService:
         self.jwt_algorithm = 'HS256'
         self.token_expiry_hours = 24
         
-        # Token blacklist (in production, use Redis or database)
-        self.blacklisted_tokens = set()
+        # Token blacklist: token digest -> expiry timestamp (in production, use Redis or database)
+        self.blacklisted_tokens: Dict[str, float] = {}
+        
+        # Verified claims per token digest, kept until the token expires
+        self.verified_tokens = TTLCache(
+            max_entries=int(os.getenv('AUTH_TOKEN_CACHE_MAX_ENTRIES', '4096')),
+            ttl=float(os.getenv('AUTH_TOKEN_CACHE_TTL', '3600'))  # for tokens without an expiry
+        )
+    
+    def _token_digest(self, token: str) -> str:
+        """Fixed-size key for a token, so neither cache nor blacklist holds raw tokens"""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
     
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
@@ -53,8 +67,15 @@ class AuthService:
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify JWT token and return user data"""
         try:
+            digest = self._token_digest(token)
+            
+            # Blacklisting evicts the cached entry, so a hit is still valid
+            cached = self.verified_tokens.get(digest)
+            if cached is not None:
+                return dict(cached)
+            
             # Check if token is blacklisted
-            if token in self.blacklisted_tokens:
+            if digest in self.blacklisted_tokens:
                 return None
             
             # Decode token
@@ -65,7 +86,7 @@ class AuthService:
             if exp and datetime.fromtimestamp(exp) < datetime.utcnow():
                 return None
             
-            return {
+            user_data = {
                 'id': payload.get('user_id'),
                 'username': payload.get('username'),
                 'email': payload.get('email'),
@@ -73,6 +94,15 @@ class AuthService:
                 'token_id': payload.get('jti')
             }
             
+            self.verified_tokens.set(digest, user_data, ttl=exp - time.time() if exp else None)
+            
+            # A logout may have landed while the token was being decoded
+            if digest in self.blacklisted_tokens:
+                self.verified_tokens.delete(digest)
+                return None
+            
+            return dict(user_data)
+        
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
@@ -88,32 +118,30 @@ class AuthService:
             jti = payload.get('jti')
             
             if jti:
-                self.blacklisted_tokens.add(token)
+                digest = self._token_digest(token)
+                self.blacklisted_tokens[digest] = payload.get('exp') or float('inf')
+                self.verified_tokens.delete(digest)
                 return True
             
             return False
-            
+        
         except Exception:
             return False
     
     def cleanup_blacklist(self):
         """Clean up expired tokens from blacklist"""
-        valid_tokens = set()
-        
-        for token in self.blacklisted_tokens:
-            try:
-                payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
-                exp = payload.get('exp')
-                
-                # Keep token if not expired
-                if exp and datetime.fromtimestamp(exp) >= datetime.utcnow():
-                    valid_tokens.add(token)
-                    
-            except Exception:
-                # Remove invalid tokens
-                continue
+        now = time.time()
         
-        self.blacklisted_tokens = valid_tokens
+        # Keep tokens that have not expired
+        self.blacklisted_tokens = {
+            digest: exp for digest, exp in self.blacklisted_tokens.items() if exp >= now
+        }
+    
+    def get_token_cache_stats(self) -> Dict[str, Any]:
+        """Get verified-token cache counters"""
+        stats = self.verified_tokens.get_stats()
+        stats['blacklisted_tokens'] = len(self.blacklisted_tokens)
+        return stats
     
     def get_token_info(self, token: str) -> Optional[Dict[str, Any]]:
         """Get detailed token information"""
@@ -128,9 +156,9 @@ class AuthService:
                 'issued_at': datetime.fromtimestamp(payload.get('iat')).isoformat() if payload.get('iat') else None,
                 'expires_at': datetime.fromtimestamp(payload.get('exp')).isoformat() if payload.get('exp') else None,
                 'token_id': payload.get('jti'),
-                'is_blacklisted': token in self.blacklisted_tokens
+                'is_blacklisted': self._token_digest(token) in self.blacklisted_tokens
             }
-            
+        
         except Exception:
             return None
 
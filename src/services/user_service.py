@@ -12,6 +12,7 @@ import uuid
 
 # Import authentication service
 from .user_auth import auth_service
+from .permission_versions import permission_versions
 
 class UserService:
     """User management and profile service"""
@@ -130,6 +131,8 @@ class UserService:
         
         self.users[user_id] = user
         self._save_users()
+        # Other workers have not loaded this user yet; let them know to
+        permission_versions.bump_user(user_id)
         
         # Log activity
         self.log_activity(user_id, 'user_created', {
@@ -238,6 +241,18 @@ class UserService:
             return user_copy
         return None
     
+    def reload_user(self, user_id: str):
+        """Refresh one user's record from storage (e.g. after another worker changed it)"""
+        user = self._load_users().get(user_id)
+        if user is None:
+            self.users.pop(user_id, None)
+        else:
+            self.users[user_id] = user
+    
+    def reload_users(self):
+        """Refresh every user record from storage"""
+        self.users = self._load_users()
+    
     def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all users (without password hashes)"""
         users = []
@@ -265,7 +280,7 @@ class UserService:
                 
                 # Update permissions if role changed
                 if field == 'role':
-                    user['permissions'] = self.get_role_permissions(update_data[field])
+                    user['permissions'] = self.get_user_permissions(update_data[field])
         
         # Handle password update separately
         if 'password' in update_data:
@@ -274,6 +289,10 @@ class UserService:
         user['updated_at'] = datetime.utcnow().isoformat()
         self._save_users()
         
+        # Cached permissions of this user are stale in every worker
+        if 'role' in update_data or 'status' in update_data:
+            permission_versions.bump_user(user_id)
+        
         # Log activity
         self.log_activity(user_id, 'user_updated', {
             'fields': list(update_data.keys())
@@ -395,6 +414,8 @@ class UserService:
         self._save_users()
         self._save_activity()
         
+        permission_versions.bump_user(user_id)
+        
         return True
 
 # Global instance
@@ -3,9 +3,11 @@ Command Executor Plugin for Jarvis
 Executes system commands and shell operations (with security restrictions)
 """
 
+import asyncio
 import subprocess
 import os
 import re
+import signal
 from typing import List
 
 # Plugin manifest - metadata about this plugin
@@ -17,7 +19,11 @@ manifest = {
     "category": "system",
     "tags": ["command", "shell", "system", "execution"],
     "requires_auth": True,
-    "enabled": True
+    "enabled": True,
+    # run_async awaits the subprocess instead of holding a thread; the router
+    # deadline sits just past the command's own 30s limit
+    "max_concurrency": 4,
+    "timeout": 35
 }
 
 # Security: List of allowed commands (whitelist approach)
@@ -68,7 +74,36 @@ def run(input_text: str) -> str:
         result = execute_safe_command(command)
         
         return format_command_result(command, result)
+    
+    except Exception as e:
+        return f"Error executing command: {str(e)}"
+
+async def run_async(input_text: str) -> str:
+    """
+    Execute a system command with security restrictions, without blocking a thread
+    
+    Same checks and output as run; the tool router awaits this on its event
+    loop, and a command still running when the call is cancelled is killed.
+    
+    Args:
+        input_text (str): Command to execute
+    
+    Returns:
+        str: Command output or error message
+    """
+    try:
+        command = extract_command(input_text)
+        if not command:
+            return "Please provide a command to execute. Example: 'run ls -la' or 'execute pwd'"
+        
+        security_check = validate_command_security(command)
+        if not security_check['safe']:
+            return f"Command blocked for security reasons: {security_check['reason']}"
+        
+        result = await execute_safe_command_async(command)
         
+        return format_command_result(command, result)
+    
     except Exception as e:
         return f"Error executing command: {str(e)}"
 
@@ -152,33 +187,92 @@ def execute_safe_command(command: str) -> dict:
             cwd=os.getcwd()
         )
         
-        # Limit output size to prevent overwhelming responses
-        stdout = result.stdout[:2000] if result.stdout else ""
-        stderr = result.stderr[:1000] if result.stderr else ""
-        
-        if len(result.stdout) > 2000:
-            stdout += "\n... (output truncated)"
-        
+        return build_command_result(command, result.returncode, result.stdout, result.stderr)
+    
+    except subprocess.TimeoutExpired:
         return {
-            'success': result.returncode == 0,
-            'returncode': result.returncode,
-            'stdout': stdout,
-            'stderr': stderr,
+            'success': False,
+            'error': 'Command timed out (30 second limit)',
             'command': command
         }
-        
-    except subprocess.TimeoutExpired:
+    except Exception as e:
         return {
             'success': False,
-            'error': 'Command timed out (30 second limit)',
+            'error': str(e),
             'command': command
         }
+
+async def execute_safe_command_async(command: str) -> dict:
+    """
+    Execute a command like execute_safe_command, awaiting the subprocess
+    
+    Args:
+        command (str): Command to execute
+    
+    Returns:
+        dict: Execution result
+    """
+    try:
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=os.getcwd(),
+            # Own process group, so the whole command can be killed, not just the shell
+            start_new_session=hasattr(os, 'killpg')
+        )
     except Exception as e:
         return {
             'success': False,
             'error': str(e),
             'command': command
         }
+    
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+    except asyncio.TimeoutError:
+        kill_command(process)
+        await process.wait()
+        return {
+            'success': False,
+            'error': 'Command timed out (30 second limit)',
+            'command': command
+        }
+    except asyncio.CancelledError:
+        # The caller stopped waiting; do not leave the command running
+        kill_command(process)
+        raise
+    
+    return build_command_result(
+        command, process.returncode,
+        stdout.decode(errors='replace'), stderr.decode(errors='replace')
+    )
+
+def kill_command(process: asyncio.subprocess.Process):
+    """Kill a command started by execute_safe_command_async and anything it spawned"""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+def build_command_result(command: str, returncode: int, stdout: str, stderr: str) -> dict:
+    """Build an execution result, limiting output size to prevent overwhelming responses"""
+    limited_stdout = stdout[:2000] if stdout else ""
+    limited_stderr = stderr[:1000] if stderr else ""
+    
+    if stdout and len(stdout) > 2000:
+        limited_stdout += "\n... (output truncated)"
+    
+    return {
+        'success': returncode == 0,
+        'returncode': returncode,
+        'stdout': limited_stdout,
+        'stderr': limited_stderr,
+        'command': command
+    }
 
 def format_command_result(command: str, result: dict) -> str:
     """Format command execution result"""
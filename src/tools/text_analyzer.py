@@ -15,7 +15,12 @@ manifest = {
     "category": "analysis",
     "tags": ["text", "analysis", "metrics", "readability"],
     "requires_auth": False,
-    "enabled": True
+    "enabled": True,
+    # Results depend only on the input text
+    "cacheable": True,
+    "cache_ttl": 3600,
+    # Counts depend on the exact characters and line breaks
+    "cache_key_normalization": "exact"
 }
 
 def run(input_text: str) -> str:
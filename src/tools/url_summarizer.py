@@ -16,7 +16,21 @@ manifest = {
     "category": "content",
     "tags": ["url", "summarize", "content", "articles", "web"],
     "requires_auth": False,
-    "enabled": True
+    "enabled": True,
+    # Routing triggers indexed by the tool router
+    "keywords": [
+        'summarize', 'summary', 'tldr', 'brief', 'overview', 'digest',
+        'key points', 'main points', 'what does', 'explain', 'breakdown'
+    ],
+    "keyword_weight": 0.4,
+    "patterns": {
+        r'https?://[^\s]+': 0.5
+    },
+    # Page summaries are reused for repeat requests on the same URL
+    "cacheable": True,
+    "cache_ttl": 600,
+    # URL paths are case-sensitive
+    "cache_key_normalization": "whitespace"
 }
 
 def run(input_text: str) -> str:
@@ -198,10 +212,7 @@ def get_summarization_confidence(input_text: str) -> float:
     Returns:
         float: Confidence score between 0.0 and 1.0
     """
-    summarization_keywords = [
-        'summarize', 'summary', 'tldr', 'brief', 'overview', 'digest',
-        'key points', 'main points', 'what does', 'explain', 'breakdown'
-    ]
+    summarization_keywords = manifest["keywords"]
     
     input_lower = input_text.lower()
     confidence = 0.0
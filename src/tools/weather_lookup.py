@@ -15,7 +15,13 @@ manifest = {
     "category": "information",
     "tags": ["weather", "location", "information"],
     "requires_auth": False,
-    "enabled": True
+    "enabled": True,
+    # Routing triggers indexed by the tool router
+    "keywords": ["weather", "forecast", "temperature"],
+    "keyword_weight": 0.4,
+    # Weather for a location changes slowly
+    "cacheable": True,
+    "cache_ttl": 300
 }
 
 def run(input_text: str) -> str:
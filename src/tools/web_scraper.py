@@ -16,7 +16,17 @@ manifest = {
     "category": "web",
     "tags": ["scraping", "web", "content", "extraction"],
     "requires_auth": False,
-    "enabled": True
+    "enabled": True,
+    # Routing triggers indexed by the tool router
+    "keywords": [
+        'scrape', 'extract', 'get content', 'fetch', 'grab', 'pull data',
+        'content from', 'text from', 'information from'
+    ],
+    "keyword_weight": 0.4,
+    "patterns": {
+        r'https?://[^\s]+': 0.5,
+        r'\.(?:com|org|net|io|co)': 0.3
+    }
 }
 
 def run(input_text: str) -> str:
@@ -162,10 +172,7 @@ def get_scraping_confidence(input_text: str) -> float:
     Returns:
         float: Confidence score between 0.0 and 1.0
     """
-    scraping_keywords = [
-        'scrape', 'extract', 'get content', 'fetch', 'grab', 'pull data',
-        'content from', 'text from', 'information from'
-    ]
+    scraping_keywords = manifest["keywords"]
     
     input_lower = input_text.lower()
     confidence = 0.0
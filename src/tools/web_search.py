@@ -16,7 +16,13 @@ manifest = {
     "category": "search",
     "tags": ["web", "search", "internet", "information"],
     "requires_auth": False,
-    "enabled": True
+    "enabled": True,
+    # Routing triggers indexed by the tool router
+    "keywords": [
+        'search', 'find', 'look up', 'google', 'what is', 'who is', 
+        'how to', 'where is', 'when did', 'why does', 'information about'
+    ],
+    "keyword_weight": 0.3
 }
 
 def run(input_text: str) -> str:
@@ -120,10 +126,7 @@ def get_search_confidence(input_text: str) -> float:
     Returns:
         float: Confidence score between 0.0 and 1.0
     """
-    search_keywords = [
-        'search', 'find', 'look up', 'google', 'what is', 'who is', 
-        'how to', 'where is', 'when did', 'why does', 'information about'
-    ]
+    search_keywords = manifest["keywords"]
     
     input_lower = input_text.lower()
     confidence = 0.0
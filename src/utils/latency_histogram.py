@@ -0,0 +1,280 @@
+"""
+Request latency metrics for Jarvis
+Fixed-bucket latency histograms with request and error counts, recorded per
+series with a short uncontended lock and summarized into percentiles on read.
+SQLiteMetricsStore sums the histograms of every worker process on the host.
+"""
+import os
+import json
+import sqlite3
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Upper bounds in milliseconds; one extra bucket catches everything slower
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+class LatencyHistogram:
+    """Request count, error count and latency distribution for one series"""
+    
+    __slots__ = ('bounds', 'counts', 'requests', 'errors', 'total_ms', 'max_ms', 'lock')
+    
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lock = threading.Lock()
+    
+    def record(self, duration_ms: float, error: bool = False):
+        """Count one request; a bisect and a handful of additions under the series lock"""
+        index = bisect_left(self.bounds, duration_ms)
+        with self.lock:
+            self.counts[index] += 1
+            self.requests += 1
+            self.total_ms += duration_ms
+            if error:
+                self.errors += 1
+            if duration_ms > self.max_ms:
+                self.max_ms = duration_ms
+    
+    def snapshot(self) -> Tuple[List[int], int, int, float, float]:
+        """Consistent copy of (counts, requests, errors, total_ms, max_ms)"""
+        with self.lock:
+            return list(self.counts), self.requests, self.errors, self.total_ms, self.max_ms
+    
+    def drain(self) -> Tuple[List[int], int, int, float, float]:
+        """Snapshot and reset in one step, for handing recorded requests to a shared store"""
+        with self.lock:
+            snapshot = (self.counts, self.requests, self.errors, self.total_ms, self.max_ms)
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.requests = 0
+            self.errors = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            return snapshot
+    
+    def merge(self, snapshot: Tuple[List[int], int, int, float, float]):
+        """Add a snapshot back in (e.g. one a failed flush could not store)"""
+        counts, requests, errors, total_ms, max_ms = snapshot
+        with self.lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.requests += requests
+            self.errors += errors
+            self.total_ms += total_ms
+            self.max_ms = max(self.max_ms, max_ms)
+
+def merge_snapshots(snapshots: Iterable[Tuple[List[int], int, int, float, float]]) -> Optional[Tuple[List[int], int, int, float, float]]:
+    """Sum snapshots taken with the same bucket bounds"""
+    merged = None
+    for counts, requests, errors, total_ms, max_ms in snapshots:
+        if merged is None:
+            merged = [list(counts), requests, errors, total_ms, max_ms]
+            continue
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += requests
+        merged[2] += errors
+        merged[3] += total_ms
+        merged[4] = max(merged[4], max_ms)
+    return tuple(merged) if merged else None
+
+def percentile(counts: List[int], bounds: Tuple[float, ...], fraction: float, max_ms: float) -> float:
+    """
+    Estimate a percentile from bucket counts
+    
+    Interpolates linearly inside the bucket holding the target rank, so the
+    error is bounded by that bucket's width; the overflow bucket and the
+    bucket holding the slowest request are capped at the observed maximum.
+    """
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = bounds[index - 1] if index > 0 else 0.0
+            upper = min(bounds[index], max_ms) if index < len(bounds) else max_ms
+            upper = max(upper, lower)
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return max_ms
+
+def summarize(snapshot: Tuple[List[int], int, int, float, float],
+              bounds: Tuple[float, ...] = DEFAULT_BUCKETS_MS) -> Dict[str, Any]:
+    """Counts, error rate and p50/p95/p99 for a (possibly merged) snapshot"""
+    counts, requests, errors, total_ms, max_ms = snapshot
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round((errors / requests) * 100, 2) if requests else 0.0,
+        "avg_ms": round(total_ms / requests, 2) if requests else 0.0,
+        "p50_ms": round(percentile(counts, bounds, 0.50, max_ms), 2),
+        "p95_ms": round(percentile(counts, bounds, 0.95, max_ms), 2),
+        "p99_ms": round(percentile(counts, bounds, 0.99, max_ms), 2),
+        "max_ms": round(max_ms, 2),
+        "buckets": {
+            (f"le_{bounds[i]}" if i < len(bounds) else "overflow"): count
+            for i, count in enumerate(counts)
+        }
+    }
+
+def summarize_series(series: List[Tuple[Hashable, str, Tuple[List[int], int, int, float, float]]],
+                     bounds: Tuple[float, ...] = DEFAULT_BUCKETS_MS, client: Hashable = None) -> Dict[str, Any]:
+    """Percentile summaries per client, per route and per (client, route) of (client, route, snapshot) series"""
+    snapshots = [entry for entry in series if client is None or entry[0] == client]
+    
+    by_client: Dict[Hashable, List] = {}
+    by_route: Dict[str, List] = {}
+    for series_client, route, snapshot in snapshots:
+        by_client.setdefault(series_client, []).append(snapshot)
+        by_route.setdefault(route, []).append(snapshot)
+    
+    overall = merge_snapshots(snapshot for _, _, snapshot in snapshots)
+    return {
+        "overall": summarize(overall, bounds) if overall else None,
+        "by_client": {c: summarize(merge_snapshots(s), bounds) for c, s in by_client.items()},
+        "by_route": {r: summarize(merge_snapshots(s), bounds) for r, s in by_route.items()},
+        "by_client_route": {
+            c: {route: summarize(snapshot, bounds) for series_client, route, snapshot in snapshots if series_client == c}
+            for c in by_client
+        },
+        "bucket_bounds_ms": list(bounds)
+    }
+
+class RequestMetrics:
+    """Latency histograms keyed by (client, route), aggregated per client and per route on read"""
+    
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.bounds = bounds
+        self.series: Dict[Tuple[Hashable, str], LatencyHistogram] = {}
+        self.lock = threading.Lock()  # only taken when a new series is created
+    
+    def record(self, client: Hashable, route: str, duration_ms: float, error: bool = False):
+        """Record one request for a client and route"""
+        key = (client, route)
+        histogram = self.series.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.series.setdefault(key, LatencyHistogram(self.bounds))
+        histogram.record(duration_ms, error)
+    
+    def summary(self, client: Hashable = None) -> Dict[str, Any]:
+        """Percentile summaries per client, per route and per (client, route), optionally for one client"""
+        with self.lock:
+            series = list(self.series.items())
+        
+        return summarize_series(
+            [(series_client, route, histogram.snapshot()) for (series_client, route), histogram in series],
+            self.bounds, client
+        )
+    
+    def drain(self) -> List[Tuple[Hashable, str, Tuple[List[int], int, int, float, float]]]:
+        """Take (client, route, snapshot) for every series with requests since the last drain"""
+        with self.lock:
+            series = list(self.series.items())
+        
+        drained = []
+        for (client, route), histogram in series:
+            snapshot = histogram.drain()
+            if snapshot[1]:
+                drained.append((client, route, snapshot))
+        return drained
+    
+    def merge(self, drained: List[Tuple[Hashable, str, Tuple[List[int], int, int, float, float]]]):
+        """Put drained snapshots back"""
+        for client, route, snapshot in drained:
+            key = (client, route)
+            with self.lock:
+                histogram = self.series.setdefault(key, LatencyHistogram(self.bounds))
+            histogram.merge(snapshot)
+    
+    def reset(self):
+        """Drop all recorded series"""
+        with self.lock:
+            self.series = {}
+
+class SQLiteMetricsStore:
+    """
+    Histograms summed across every process on the host
+    
+    Workers record into their own RequestMetrics and periodically add the
+    drained deltas here, one IMMEDIATE transaction per flush; reads merge
+    the stored totals, so any worker reports the whole host.
+    """
+    
+    def __init__(self, db_path: str, bounds: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.db_path = db_path
+        self.bounds = bounds
+        self.local = threading.local()
+        
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS request_metrics (
+                client TEXT NOT NULL,
+                route TEXT NOT NULL,
+                counts TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                errors INTEGER NOT NULL,
+                total_ms REAL NOT NULL,
+                max_ms REAL NOT NULL,
+                PRIMARY KEY (client, route)
+            )
+        ''')
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One autocommit connection per thread, reused across requests"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+    
+    def add(self, drained: List[Tuple[Hashable, str, Tuple[List[int], int, int, float, float]]]):
+        """Add drained (client, route, snapshot) deltas to the stored totals"""
+        if not drained:
+            return
+        
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for client, route, snapshot in drained:
+                row = conn.execute(
+                    'SELECT counts, requests, errors, total_ms, max_ms FROM request_metrics WHERE client = ? AND route = ?',
+                    (str(client), route)
+                ).fetchone()
+                if row:
+                    snapshot = merge_snapshots([(json.loads(row[0]), *row[1:]), snapshot])
+                
+                counts, requests, errors, total_ms, max_ms = snapshot
+                conn.execute('''
+                    INSERT INTO request_metrics (client, route, counts, requests, errors, total_ms, max_ms)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(client, route) DO UPDATE SET
+                        counts = excluded.counts,
+                        requests = excluded.requests,
+                        errors = excluded.errors,
+                        total_ms = excluded.total_ms,
+                        max_ms = excluded.max_ms
+                ''', (str(client), route, json.dumps(counts), requests, errors, total_ms, max_ms))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def summary(self, client: Hashable = None) -> Dict[str, Any]:
+        """Percentile summaries over every worker's flushed requests, optionally for one client"""
+        rows = self._connection().execute(
+            'SELECT client, route, counts, requests, errors, total_ms, max_ms FROM request_metrics'
+        ).fetchall()
+        series = [
+            (row_client, route, (json.loads(counts), requests, errors, total_ms, max_ms))
+            for row_client, route, counts, requests, errors, total_ms, max_ms in rows
+        ]
+        return summarize_series(series, self.bounds, None if client is None else str(client))
@@ -0,0 +1,151 @@
+"""
+Rate limiting utilities for Jarvis
+Token buckets enforcing per-minute and per-hour limits with a few numbers per client,
+kept in process memory or in SQLite shared by every worker on the host
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+def refill_buckets(state: Optional[List[float]], now: float, per_minute: int, per_hour: int) -> List[float]:
+    """
+    Bring a client's buckets up to date
+    
+    State is [minute_tokens, hour_tokens, updated_at]. Each bucket holds at most
+    its limit and refills continuously at limit per window, so a client can burst
+    up to the limit and sustains exactly the configured rate.
+    """
+    if state is None:
+        return [float(per_minute), float(per_hour), now]
+    
+    elapsed = max(0.0, now - state[2])
+    return [
+        min(float(per_minute), state[0] + elapsed * per_minute / 60.0),
+        min(float(per_hour), state[1] + elapsed * per_hour / 3600.0),
+        now
+    ]
+
+def take_token(state: List[float], per_minute: int, per_hour: int) -> Tuple[bool, float]:
+    """
+    Spend one token from both buckets if both have one
+    
+    Returns (allowed, retry_after_seconds); retry_after is how long until
+    both buckets will hold a whole token again.
+    """
+    if state[0] >= 1 and state[1] >= 1:
+        state[0] -= 1
+        state[1] -= 1
+        return True, 0.0
+    
+    waits = [0.0]
+    if state[0] < 1:
+        waits.append((1 - state[0]) * 60.0 / per_minute if per_minute > 0 else 3600.0)
+    if state[1] < 1:
+        waits.append((1 - state[1]) * 3600.0 / per_hour if per_hour > 0 else 3600.0)
+    return False, max(waits)
+
+class TokenBucketLimiter:
+    """In-process token bucket limiter with a bounded number of tracked clients"""
+    
+    def __init__(self, max_clients: int = 100000):
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def acquire(self, key: Hashable, per_minute: int, per_hour: int) -> Tuple[bool, float]:
+        """Take one request from a client's allowance; returns (allowed, retry_after_seconds)"""
+        now = time.time()
+        with self.lock:
+            state = refill_buckets(self.buckets.get(key), now, per_minute, per_hour)
+            allowed, retry_after = take_token(state, per_minute, per_hour)
+            
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            
+            # Forgetting the least recently seen client only refills its buckets early
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+            
+            return allowed, retry_after
+    
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+class SQLiteTokenBucketLimiter:
+    """
+    Token bucket limiter whose state is shared by every process on the host
+    
+    Buckets live in a SQLite database in WAL mode; each acquire is one short
+    IMMEDIATE transaction, so concurrent gunicorn workers serialize on the
+    row update and enforce a single limit per client.
+    """
+    
+    def __init__(self, db_path: str, prune_interval: float = 300.0):
+        self.db_path = db_path
+        self.prune_interval = prune_interval
+        self.last_prune = 0.0
+        self.local = threading.local()
+        
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                client_key TEXT PRIMARY KEY,
+                minute_tokens REAL NOT NULL,
+                hour_tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One autocommit connection per thread, reused across requests"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+    
+    def acquire(self, key: Hashable, per_minute: int, per_hour: int) -> Tuple[bool, float]:
+        """Take one request from a client's allowance; returns (allowed, retry_after_seconds)"""
+        conn = self._connection()
+        client_key = str(key)
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute(
+                'SELECT minute_tokens, hour_tokens, updated_at FROM rate_limit_buckets WHERE client_key = ?',
+                (client_key,)
+            ).fetchone()
+            
+            state = refill_buckets(list(row) if row else None, now, per_minute, per_hour)
+            allowed, retry_after = take_token(state, per_minute, per_hour)
+            
+            conn.execute('''
+                INSERT INTO rate_limit_buckets (client_key, minute_tokens, hour_tokens, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(client_key) DO UPDATE SET
+                    minute_tokens = excluded.minute_tokens,
+                    hour_tokens = excluded.hour_tokens,
+                    updated_at = excluded.updated_at
+            ''', (client_key, state[0], state[1], state[2]))
+            
+            # Buckets idle for an hour are full again, so dropping them changes nothing
+            if now - self.last_prune > self.prune_interval:
+                self.last_prune = now
+                conn.execute('DELETE FROM rate_limit_buckets WHERE updated_at < ?', (now - 3600,))
+            
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        
+        return allowed, retry_after
+    
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM rate_limit_buckets').fetchone()[0]
@@ -0,0 +1,108 @@
+"""
+Bounded cache utilities for Jarvis
+Thread-safe LRU cache with per-entry expiry and hit/miss/eviction counters
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+class TTLCache:
+    """LRU cache whose entries expire after a time-to-live"""
+    
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """
+        Return the cached value, or default if missing or expired
+        
+        With count=False the lookup is not added to the hit/miss counters, for
+        callers that consult several keys per logical lookup and call
+        record_lookup once themselves.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+            
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                if count:
+                    self.misses += 1
+                return default
+            
+            self.entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[1]
+    
+    def record_lookup(self, hit: bool):
+        """Count one logical lookup made of uncounted get calls"""
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: Hashable) -> bool:
+        """Remove an entry; returns True if it was present"""
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+    
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches the predicate"""
+        with self.lock:
+            keys = [key for key in self.entries if predicate(key)]
+            for key in keys:
+                del self.entries[key]
+            return len(keys)
+    
+    def clear(self):
+        """Remove all entries (counters are kept)"""
+        with self.lock:
+            self.entries.clear()
+    
+    def values(self) -> List[Any]:
+        """Snapshot of the values that have not expired"""
+        now = time.monotonic()
+        with self.lock:
+            return [value for expires_at, value in self.entries.values() if expires_at >= now]
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss/eviction counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }